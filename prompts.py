@@ -30,6 +30,9 @@ except ImportError:
 SETTINGS = Settings()
 OPENAI_CLIENT = OpenAI(api_key=SETTINGS.openai_api_key)
 
+# Fallback demo prompts returned when suggested prompt generation fails
+DEMO_PROMPTS = ("Search for restaurants near me", "Check my email", "Get the price of AAPL")
+
 # Import orchestrator agent to get available agents and tools
 try:
     from connectors.orchestrator import ORCHESTRATOR_AGENT, TOOL_CALLS
@@ -272,7 +275,7 @@ class AgentCapabilities:
                 # Fallback if JSON parsing fails
                 return {
                     "suggested_prompts": [],
-                    "demo_prompts": ["Search for restaurants near me", "Check my email", "Get the price of AAPL"]
+                    "demo_prompts": list(DEMO_PROMPTS)
                 }
 
         except Exception as e:
@@ -280,7 +283,7 @@ class AgentCapabilities:
             # Return fallback suggestions
             return {
                 "suggested_prompts": [],
-                "demo_prompts": ["Search for restaurants near me", "Check my email", "Get the price of AAPL"]
+                "demo_prompts": list(DEMO_PROMPTS)
             }
 
 
@@ -9,13 +9,15 @@ from __future__ import annotations
 
 import asyncio
 import base64
-import json
+import binascii
 import logging
 import os
 import time
+from collections import deque
 from datetime import datetime
 from typing import Any
 
+import orjson
 from fastapi import WebSocket
 
 from agents.realtime.config import (RealtimeRunConfig,
@@ -90,6 +92,30 @@ REALTIME_MODEL_CONFIG = RealtimeModelConfig(initial_model_settings=RealtimeSessi
 
 OPENAI_CLIENT = OpenAI(api_key=SETTINGS.openai_api_key)
 
+# Instruction sent to the agent when a media stream starts
+_GREETING = (
+    "The Call SID is {call_sid}. Greet the user with 'Hello! Welcome to the oh die "
+    "Voice Assistant. How can I help you today?' and then wait for the user to speak. "
+    "Do not spell out ODAI but pronouce the name as 'oh die'."
+)
+
+# Marks Twilio has not acknowledged yet; older ones are dropped past this
+MAX_PENDING_MARKS = 256
+
+# Outbound frames a call may queue before new frames wait for the writer.
+# Each audio chunk queues a media and a mark frame, so this holds about 100
+# chunks however long each one is.
+MAX_OUTBOUND_FRAMES = 200
+
+# How long a frame may wait for room in a full outbound queue before the
+# call is dropped as too slow to keep up
+OUTBOUND_STALL_TIMEOUT_S = 2.0
+
+# Shared zero buffer for playback-tracker acknowledgements; the tracker
+# only measures its length
+_SILENCE = bytes(1 << 16)
+_SILENCE_VIEW = memoryview(_SILENCE)
+
 
 class TwilioHandler:
     """Handles Twilio voice call interactions with AI assistant.
@@ -109,7 +135,10 @@ class TwilioHandler:
             user: User object for the caller
         """
         self.twilio_websocket = twilio_websocket
+        self._realtime_session_task: asyncio.Task[None] | None = None
         self._message_loop_task: asyncio.Task[None] | None = None
+        self._buffer_flush_task: asyncio.Task[None] | None = None
+        self._writer_task: asyncio.Task[None] | None = None
         self.session: RealtimeSession | None = None
         self.playback_tracker = RealtimePlaybackTracker()
         self.settings = Settings()
@@ -142,15 +171,34 @@ class TwilioHandler:
         self.BUFFER_SIZE_BYTES = int(
             self.SAMPLE_RATE * self.CHUNK_LENGTH_S)  # 50ms worth of audio
 
-        self._stream_sid: str | None = None
-        self._audio_buffer: bytearray = bytearray()
+        self._set_stream_sid(None)
+        # Preallocated buffer: incoming audio is written at _write_pos and
+        # flushed from _read_pos, then both rewind to 0 instead of shrinking
+        self._audio_buffer: bytearray = bytearray(self.BUFFER_SIZE_BYTES * 2)
+        self._write_pos = 0
+        self._read_pos = 0
         self._last_buffer_send_time = time.time()
 
+        # Outbound Twilio frames, sent in order by _twilio_writer_loop
+        self._out_queue: asyncio.Queue[str] = asyncio.Queue(
+            maxsize=MAX_OUTBOUND_FRAMES)
+        self._disconnected = False
+
         # Mark event tracking for playback
         self._mark_counter = 0
         self._mark_data: dict[
-            str, tuple[str, int, int]
+            int, tuple[str, int, int]
         ] = {}  # mark_id -> (item_id, content_index, byte_count)
+        self._mark_order: deque[int] = deque(maxlen=MAX_PENDING_MARKS)
+
+    def _set_stream_sid(self, stream_sid: str | None) -> None:
+        """Record the Twilio stream SID and encode the frames that depend only on it."""
+        self._stream_sid = stream_sid
+        self._clear_msg = orjson.dumps(
+            {"event": "clear", "streamSid": stream_sid}).decode()
+        # The keyboard sound is ~110 KB of base64; encoded on the first agent
+        # start of each stream and reused after that
+        self._kbd_msg: str | None = None
 
     async def start(self) -> None:
         """Start the session."""
@@ -187,12 +235,23 @@ class TwilioHandler:
             self._twilio_message_loop())
         self._buffer_flush_task = asyncio.create_task(
             self._buffer_flush_loop())
+        self._writer_task = asyncio.create_task(
+            self._twilio_writer_loop())
 
     async def wait_until_done(self) -> None:
         """Wait until the session is done."""
         assert self._message_loop_task is not None
         await self._message_loop_task
 
+    async def flush(self, timeout: float = 2.0) -> None:
+        """Send buffered caller audio and wait for queued Twilio frames to go out.
+
+        Raises asyncio.TimeoutError if the outbound backlog is not sent within
+        ``timeout`` seconds, so shutdown never blocks on a stalled socket.
+        """
+        await self._flush_audio_buffer()
+        await asyncio.wait_for(self._out_queue.join(), timeout)
+
     async def _realtime_session_loop(self) -> None:
         """Listen for events from the realtime session."""
         assert self.session is not None
@@ -207,26 +266,44 @@ class TwilioHandler:
         try:
             while True:
                 message_text = await self.twilio_websocket.receive_text()
-                message = json.loads(message_text)
+                message = orjson.loads(message_text)
                 await self._handle_twilio_message(message)
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"Failed to parse Twilio message as JSON: {e}")
         except Exception as e:
             logger.error(f"Error in Twilio message loop: {e}")
+        finally:
+            # The call is over: send what is already queued, then stop the
+            # loops that nothing will feed again
+            if self._writer_task is not None and not self._disconnected:
+                try:
+                    await self.flush()
+                except asyncio.TimeoutError:
+                    logger.warning(
+                        f"Dropping unsent Twilio frames for stream {self._stream_sid}")
+            await self._stop_background_tasks()
+
+    async def _stop_background_tasks(self) -> None:
+        """Cancel the session, writer and buffer-flush loops and wait for them to exit."""
+        tasks = [task for task in (self._realtime_session_task,
+                                   self._writer_task, self._buffer_flush_task)
+                 if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
     async def _handle_realtime_event(self, event: RealtimeSessionEvent) -> None:
         """Handle events from the realtime session."""
         if event.type == "agent_start":
             logger.info(f"Agent started: {event.agent.name}")
-            sound = get_computer_keyboard_typing_sound(5, 1)
-            audio_delta = {
-                "event": "media",
-                "streamSid": self._stream_sid,
-                "media": {
-                    "payload": sound
-                }
-            }
-            await self.twilio_websocket.send_json(audio_delta)
+            if self._kbd_msg is None:
+                sound = get_computer_keyboard_typing_sound(5, 1)
+                self._kbd_msg = orjson.dumps({
+                    "event": "media",
+                    "streamSid": self._stream_sid,
+                    "media": {"payload": sound},
+                }).decode()
+            await self._enqueue_frame(self._kbd_msg)
             self.playing_sound = True
 
         elif event.type == "agent_end":
@@ -250,44 +327,45 @@ class TwilioHandler:
         if event.type == "audio":
             if self.playing_sound:
                 self.playing_sound = False
-                message = {'event': 'clear', 'streamSid': self._stream_sid}
-                await self.twilio_websocket.send_json(message)
+                await self._enqueue_frame(self._clear_msg)
 
             base64_audio = base64.b64encode(event.audio.data).decode("utf-8")
-            await self.twilio_websocket.send_text(
-                json.dumps(
+            await self._enqueue_frame(
+                orjson.dumps(
                     {
                         "event": "media",
                         "streamSid": self._stream_sid,
                         "media": {"payload": base64_audio},
                     }
-                )
+                ).decode()
             )
 
             # Send mark event for playback tracking
             self._mark_counter += 1
-            mark_id = str(self._mark_counter)
+            mark_id = self._mark_counter
+            if len(self._mark_order) == MAX_PENDING_MARKS:
+                # Evict the oldest mark before the deque drops its id
+                self._mark_data.pop(self._mark_order[0], None)
+            self._mark_order.append(mark_id)
             self._mark_data[mark_id] = (
                 event.audio.item_id,
                 event.audio.content_index,
                 len(event.audio.data),
             )
 
-            await self.twilio_websocket.send_text(
-                json.dumps(
+            await self._enqueue_frame(
+                orjson.dumps(
                     {
                         "event": "mark",
                         "streamSid": self._stream_sid,
-                        "mark": {"name": mark_id},
+                        "mark": {"name": str(mark_id)},
                     }
-                )
+                ).decode()
             )
 
         elif event.type == "audio_interrupted":
             logger.debug("Sending audio interrupted to Twilio")
-            await self.twilio_websocket.send_text(
-                json.dumps({"event": "clear", "streamSid": self._stream_sid})
-            )
+            await self._enqueue_frame(self._clear_msg)
         elif event.type == "audio_end":
             logger.debug("Audio end")
         elif event.type == "raw_model_event":
@@ -295,6 +373,73 @@ class TwilioHandler:
         else:
             pass
 
+    async def _enqueue_frame(self, frame: str) -> None:
+        """Queue a frame for Twilio, dropping the call if the writer stalls.
+
+        A full queue on its own is not a stall: a burst of audio can fill it
+        faster than one writer wake-up drains it. The frame waits up to
+        OUTBOUND_STALL_TIMEOUT_S for room before the call is dropped.
+        """
+        if self._disconnected:
+            return
+        try:
+            self._out_queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(
+                    self._out_queue.put(frame), OUTBOUND_STALL_TIMEOUT_S)
+            except asyncio.TimeoutError:
+                await self._force_disconnect("client too slow")
+
+    async def _force_disconnect(self, reason: str) -> None:
+        """Close the Twilio WebSocket once; the message loop then ends the call."""
+        if self._disconnected:
+            return
+        self._disconnected = True
+        logger.warning(f"Disconnecting Twilio stream {self._stream_sid}: {reason}")
+        try:
+            await self.twilio_websocket.close(reason=reason)
+        except Exception as e:
+            logger.error(f"Error closing Twilio WebSocket: {e}")
+
+    async def _drain_out_queue(self) -> None:
+        """Send every queued frame to Twilio without waiting for new ones."""
+        while not self._out_queue.empty():
+            frame = self._out_queue.get_nowait()
+            try:
+                await self.twilio_websocket.send_text(frame)
+            finally:
+                self._out_queue.task_done()
+
+    async def _twilio_writer_loop(self) -> None:
+        """Send queued frames to Twilio, draining the backlog on each wake-up.
+
+        Twilio expects one JSON message per WebSocket frame, so frames are
+        written back to back rather than merged.
+        """
+        try:
+            while True:
+                frame = await self._out_queue.get()
+                try:
+                    await self.twilio_websocket.send_text(frame)
+                finally:
+                    self._out_queue.task_done()
+                await self._drain_out_queue()
+        except Exception as e:
+            logger.error(f"Error in Twilio writer loop: {e}")
+            # Nothing will reach Twilio any more: end the call, stop producing
+            # frames and release anyone waiting on the backlog
+            await self._force_disconnect("send failed")
+            if self._realtime_session_task is not None:
+                self._realtime_session_task.cancel()
+            self._discard_out_queue()
+
+    def _discard_out_queue(self) -> None:
+        """Drop every queued frame, marking each one done for flush()."""
+        while not self._out_queue.empty():
+            self._out_queue.get_nowait()
+            self._out_queue.task_done()
+
     async def _handle_twilio_message(self, message: dict[str, Any]) -> None:
         """Handle incoming messages from Twilio Media Stream."""
         try:
@@ -304,13 +449,9 @@ class TwilioHandler:
                 logger.info("Twilio media stream connected")
             elif event == "start":
                 start_data = message.get("start", {})
-                self._stream_sid = start_data.get("streamSid")
+                self._set_stream_sid(start_data.get("streamSid"))
                 self.call_sid = start_data.get("callSid")
-                greeting_message = (
-                    f"The Call SID is {self.call_sid}. Greet the user with 'Hello! Welcome to the oh die "
-                    "Voice Assistant. How can I help you today?' and then wait for the user to speak. "
-                    "Do not spell out ODAI but pronouce the name as 'oh die'."
-                )
+                greeting_message = _GREETING.format(call_sid=self.call_sid)
                 caller_info = self.twilio_client.calls(
                     message['start']['callSid']).fetch()
                 if caller_info._from:
@@ -343,31 +484,47 @@ class TwilioHandler:
 
         if payload:
             try:
-                # Decode base64 audio from Twilio (µ-law format)
-                ulaw_bytes = base64.b64decode(payload)
+                # Decode base64 audio from Twilio (µ-law format); a2b_base64
+                # takes the ASCII str or bytes payload as-is
+                ulaw_bytes = binascii.a2b_base64(payload)
 
                 # Add original µ-law to buffer for OpenAI (they expect µ-law)
-                self._audio_buffer.extend(ulaw_bytes)
+                self._buffer_audio(ulaw_bytes)
 
                 # Send buffered audio if we have enough data
-                if len(self._audio_buffer) >= self.BUFFER_SIZE_BYTES:
+                if self._write_pos - self._read_pos >= self.BUFFER_SIZE_BYTES:
                     await self._flush_audio_buffer()
 
             except Exception as e:
                 logger.error(f"Error processing audio from Twilio: {e}")
 
+    def _buffer_audio(self, data: bytes) -> None:
+        """Copy audio into the preallocated buffer at the write position."""
+        end = self._write_pos + len(data)
+        if end > len(self._audio_buffer):
+            # Oversized frame: move to a larger buffer rather than dropping
+            # audio. A live view from a flush would make resizing in place fail
+            grown = bytearray(end)
+            grown[:self._write_pos] = memoryview(self._audio_buffer)[:self._write_pos]
+            self._audio_buffer = grown
+        self._audio_buffer[self._write_pos:end] = data
+        self._write_pos = end
+
     async def _handle_mark_event(self, message: dict[str, Any]) -> None:
         """Handle mark events from Twilio to update playback tracker."""
         try:
             mark_data = message.get("mark", {})
-            mark_id = mark_data.get("name", "")
+            mark_name = mark_data.get("name", "")
 
-            # Look up stored data for this mark ID
-            if mark_id in self._mark_data:
-                item_id, item_content_index, byte_count = self._mark_data[mark_id]
+            # Look up and clean up stored data for this mark ID
+            entry = self._mark_data.pop(
+                int(mark_name), None) if mark_name.isdigit() else None
+            if entry is not None:
+                item_id, item_content_index, byte_count = entry
 
                 # Convert byte count back to bytes for playback tracker
-                audio_bytes = b"\x00" * byte_count  # Placeholder bytes
+                audio_bytes = (_SILENCE_VIEW[:byte_count]
+                               if byte_count <= len(_SILENCE) else bytes(byte_count))
 
                 # Update playback tracker
                 self.playback_tracker.on_play_bytes(
@@ -376,24 +533,22 @@ class TwilioHandler:
                     f"Playback tracker updated: {item_id}, index {item_content_index}, {byte_count} bytes"
                 )
 
-                # Clean up the stored data
-                del self._mark_data[mark_id]
-
         except Exception as e:
             logger.error(f"Error handling mark event: {e}")
 
     async def _flush_audio_buffer(self) -> None:
         """Send buffered audio to OpenAI."""
-        if not self._audio_buffer or not self.session:
+        if self._write_pos == self._read_pos or not self.session:
             return
 
         try:
-            # Send the buffered audio
-            buffer_data = bytes(self._audio_buffer)
-            await self.session.send_audio(buffer_data)
+            # Send the buffered audio. send_audio base64-encodes it before
+            # returning, so a view into the buffer goes out without a copy
+            await self.session.send_audio(
+                memoryview(self._audio_buffer)[self._read_pos:self._write_pos])
 
-            # Clear the buffer
-            self._audio_buffer.clear()
+            # Rewind the buffer
+            self._read_pos = self._write_pos = 0
             self._last_buffer_send_time = time.time()
 
         except Exception as e:
@@ -408,7 +563,7 @@ class TwilioHandler:
                 # If buffer has data and it's been too long since last send, flush it
                 current_time = time.time()
                 if (
-                    self._audio_buffer
+                    self._write_pos > self._read_pos
                     and current_time - self._last_buffer_send_time > self.CHUNK_LENGTH_S * 2
                 ):
                     await self._flush_audio_buffer()
@@ -5,6 +5,7 @@ for use with Twilio voice streams, including format conversion and
 sound effect generation.
 """
 
+import functools
 import wave
 import audioop
 import base64
@@ -37,11 +38,13 @@ def openai_audio_to_twilio_mulaw(audio_data: np.ndarray) -> bytes:
     # μ-law encode
     return audioop.lin2ulaw(resampled_int16.tobytes(), 2)
 
+@functools.cache
 def get_computer_keyboard_typing_sound(seconds: int, sequence: int):
     """Generate keyboard typing sound effect in μ-law format.
     
     Reads a pre-recorded keyboard typing sound and converts it to μ-law
-    format suitable for Twilio voice streams.
+    format suitable for Twilio voice streams. The encoded result is cached,
+    so the file is read and resampled once per process.
     
     Args:
         seconds: Duration in seconds (currently unused)
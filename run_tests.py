@@ -109,6 +109,11 @@ def main():
         action="store_true",
         help="Install test dependencies first"
     )
+    parser.add_argument(
+        "--smoke",
+        action="store_true",
+        help="Also run the smoke tests that pytest.ini deselects by default"
+    )
     parser.add_argument(
         "--workers",
         "-w",
@@ -146,6 +151,10 @@ def main():
     else:
         cmd.append("-q")
 
+    # Override the default "not smoke" marker filter from pytest.ini
+    if args.smoke:
+        cmd.extend(["-m", "smoke or not smoke"])
+
     # Add parallel execution if workers > 0
     if args.workers > 0:
         cmd.extend(["-n", str(args.workers)])
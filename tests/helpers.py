@@ -0,0 +1,88 @@
+"""
+Plain helpers shared by the connector test modules.
+
+Fixtures belong in conftest.py; this module holds the constants and
+functions tests import directly.
+"""
+
+import os
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlsplit
+
+import orjson
+import pytest
+
+
+# Marks the static agent-configuration test classes that ODAI_FAST_TESTS=1 skips
+skip_in_fast_mode = pytest.mark.skipif(
+    os.environ.get("ODAI_FAST_TESTS") == "1",
+    reason="static config checks skipped with ODAI_FAST_TESTS=1",
+)
+
+
+def split_url(url):
+    """Split a request URL into its path and parsed query parameters."""
+    parts = urlsplit(url)
+    return parts.path, parse_qs(parts.query, keep_blank_values=True)
+
+
+class _InvalidJSONResponse:
+    """HTTP response stand-in whose body is not valid JSON."""
+    __slots__ = ()
+
+    def json(self):
+        raise ValueError("Invalid JSON")
+
+
+# Stateless, so every test that needs a bad body can share this one instance
+INVALID_JSON_RESPONSE = _InvalidJSONResponse()
+
+
+def stub_wrapper(**settings):
+    """RunContextWrapper stand-in; the connector tools only read wrapper.context.settings."""
+    return SimpleNamespace(context=SimpleNamespace(settings=SimpleNamespace(**settings)))
+
+
+def json_response(data):
+    """Response stand-in whose json() decodes ``data`` afresh on each call.
+
+    The body is encoded once here, so no test can leak edits to a decoded
+    payload into another test sharing the same canned data.
+    """
+    body = orjson.dumps(data)
+    return SimpleNamespace(json=lambda: orjson.loads(body))
+
+
+class FakeRequests:
+    """Stand-in for a connector's ``requests`` module that answers get() by URL route.
+
+    ``routes`` maps a URL substring to the JSON data returned by default.
+    Routes are checked in order, so list the more specific ones first.
+    """
+
+    def __init__(self, routes):
+        self._routes = dict(routes)
+        self.reset()
+
+    def reset(self):
+        """Restore the default responses and clear the recorded URLs."""
+        self.responses = {route: json_response(data) for route, data in self._routes.items()}
+        self.urls = []
+        self.side_effect = None
+
+    def respond(self, route, data):
+        """Answer ``route`` with ``data`` until the next reset()."""
+        self.responses[route] = json_response(data)
+
+    @property
+    def last_url(self):
+        return self.urls[-1]
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        if self.side_effect is not None:
+            raise self.side_effect
+        for route in self._routes:
+            if route in url:
+                return self.responses[route]
+        raise AssertionError(f"Unexpected request URL: {url}")
@@ -5,13 +5,15 @@ Tests cover AgentCapabilities parsing, suggested prompt generation, and request
 """
 
 import pytest
-import json
-from unittest.mock import Mock, patch, MagicMock, AsyncMock
+import orjson
+from unittest.mock import DEFAULT, Mock, patch
 from typing import Dict, List, Any
 
 from agents import Agent, Handoff, Tool, TResponseInputItem, FunctionTool
 from openai import OpenAI
 
+from prompts import DEMO_PROMPTS
+
 
 class TestAgentCapabilities:
     """Test AgentCapabilities class and its methods."""
@@ -128,13 +130,13 @@ class TestGenerateSuggestedPrompts:
         # Mock OpenAI response
         mock_response = Mock()
         mock_response.choices = [Mock()]
-        mock_response.choices[0].message.content = json.dumps({
+        mock_response.choices[0].message.content = orjson.dumps({
             "suggested_prompts": [
                 {"prompt": "Send email", "likelihood": 0.8},
                 {"prompt": "Save document", "likelihood": 0.6},
                 {"prompt": "Check calendar", "likelihood": 0.4}
             ]
-        })
+        }).decode()
 
         mock_openai_client.chat.completions.create.return_value = mock_response
 
@@ -169,13 +171,13 @@ class TestGenerateSuggestedPrompts:
         # Mock response with varying likelihoods
         mock_response = Mock()
         mock_response.choices = [Mock()]
-        mock_response.choices[0].message.content = json.dumps({
+        mock_response.choices[0].message.content = orjson.dumps({
             "suggested_prompts": [
                 {"prompt": "High likelihood", "likelihood": 0.9},
                 {"prompt": "Low likelihood", "likelihood": 0.2},
                 {"prompt": "Medium likelihood", "likelihood": 0.5}
             ]
-        })
+        }).decode()
 
         mock_openai_client.chat.completions.create.return_value = mock_response
 
@@ -213,7 +215,7 @@ class TestGenerateSuggestedPrompts:
         # The function returns a dict with suggested_prompts and demo_prompts on error
         assert result == {
             "suggested_prompts": [],
-            "demo_prompts": ["Search for restaurants near me", "Check my email", "Get the price of AAPL"]
+            "demo_prompts": list(DEMO_PROMPTS)
         }
 
     @pytest.mark.asyncio
@@ -235,7 +237,7 @@ class TestGenerateSuggestedPrompts:
 
         assert result == {
             "suggested_prompts": [],
-            "demo_prompts": ["Search for restaurants near me", "Check my email", "Get the price of AAPL"]
+            "demo_prompts": list(DEMO_PROMPTS)
         }
 
     @pytest.mark.asyncio
@@ -248,9 +250,9 @@ class TestGenerateSuggestedPrompts:
         # Mock response
         mock_response = Mock()
         mock_response.choices = [Mock()]
-        mock_response.choices[0].message.content = json.dumps({
+        mock_response.choices[0].message.content = orjson.dumps({
             "suggested_prompts": [{"prompt": "New action", "likelihood": 0.7}]
-        })
+        }).decode()
 
         mock_openai_client.chat.completions.create.return_value = mock_response
 
@@ -280,10 +282,11 @@ class TestGenerateSuggestedPrompts:
 class TestDetermineIfRequestHandled:
     """Test determine_if_request_handled functionality."""
 
+    # patch.multiple passes its mocks by keyword; the None defaults stop pytest
+    # from looking them up as fixtures
     @pytest.mark.asyncio
-    @patch('prompts.track_unhandled_request')
-    @patch('prompts.OPENAI_CLIENT')
-    async def test_request_handled_true(self, mock_openai_client, mock_track):
+    @patch.multiple('prompts', OPENAI_CLIENT=DEFAULT, track_unhandled_request=DEFAULT)
+    async def test_request_handled_true(self, OPENAI_CLIENT=None, track_unhandled_request=None):
         """Test when request is handled successfully."""
         from prompts import determine_if_request_handled
         from firebase import User
@@ -291,13 +294,11 @@ class TestDetermineIfRequestHandled:
         # Mock response indicating request was handled
         mock_response = Mock()
         mock_response.choices = [Mock()]
-        mock_response.choices[0].message.content = json.dumps({
+        mock_response.choices[0].message.content = orjson.dumps({
             "request_handled": True,
             "capability_requested": None,
             "capability_description": None
-        })
-
-        mock_openai_client.chat.completions.create.return_value = mock_response
+        }).decode()
 
         user = Mock(spec=User)
         conversation_input = [
@@ -305,17 +306,17 @@ class TestDetermineIfRequestHandled:
             {"role": "assistant", "content": "The weather is sunny and 75°F."}
         ]
 
+        OPENAI_CLIENT.chat.completions.create.return_value = mock_response
         result = await determine_if_request_handled(
             conversation_input, user, "chat123", "What's the weather?"
         )
 
         assert result == (True, None, None)
-        mock_track.assert_not_called()
+        track_unhandled_request.assert_not_called()
 
     @pytest.mark.asyncio
-    @patch('prompts.track_unhandled_request')
-    @patch('prompts.OPENAI_CLIENT')
-    async def test_request_handled_false(self, mock_openai_client, mock_track):
+    @patch.multiple('prompts', OPENAI_CLIENT=DEFAULT, track_unhandled_request=DEFAULT)
+    async def test_request_handled_false(self, OPENAI_CLIENT=None, track_unhandled_request=None):
         """Test when request is not handled."""
         from prompts import determine_if_request_handled
         from firebase import User
@@ -323,13 +324,11 @@ class TestDetermineIfRequestHandled:
         # Mock response indicating request was not handled
         mock_response = Mock()
         mock_response.choices = [Mock()]
-        mock_response.choices[0].message.content = json.dumps({
+        mock_response.choices[0].message.content = orjson.dumps({
             "request_handled": False,
             "capability_requested": "spotify_integration",
             "capability_description": "Play music on Spotify"
-        })
-
-        mock_openai_client.chat.completions.create.return_value = mock_response
+        }).decode()
 
         user = Mock(spec=User)
         conversation_input = [
@@ -337,21 +336,21 @@ class TestDetermineIfRequestHandled:
             {"role": "assistant", "content": "I'm sorry, I don't have Spotify integration."}
         ]
 
+        OPENAI_CLIENT.chat.completions.create.return_value = mock_response
         result = await determine_if_request_handled(
             conversation_input, user, "chat123", "Play my favorite playlist on Spotify"
         )
 
         assert result == (False, "spotify_integration",
                           "Play music on Spotify")
-        mock_track.assert_called_once_with(
+        track_unhandled_request.assert_called_once_with(
             user, "chat123", "Play my favorite playlist on Spotify",
             "spotify_integration", "Play music on Spotify"
         )
 
     @pytest.mark.asyncio
-    @patch('prompts.OPENAI_CLIENT')
-    @patch('prompts.track_unhandled_request')
-    async def test_request_handled_json_error(self, mock_track, mock_openai_client):
+    @patch.multiple('prompts', OPENAI_CLIENT=DEFAULT, track_unhandled_request=DEFAULT)
+    async def test_request_handled_json_error(self, OPENAI_CLIENT=None, track_unhandled_request=None):
         """Test handling of JSON decode errors."""
         from prompts import determine_if_request_handled
         from firebase import User
@@ -361,19 +360,17 @@ class TestDetermineIfRequestHandled:
         mock_response.choices = [Mock()]
         mock_response.choices[0].message.content = "Not valid JSON"
 
-        mock_openai_client.chat.completions.create.return_value = mock_response
-
         user = Mock(spec=User)
 
+        OPENAI_CLIENT.chat.completions.create.return_value = mock_response
         result = await determine_if_request_handled([], user, "chat123", "test")
 
         # Should default to handled=True on error
         assert result == (True, None, None)
 
     @pytest.mark.asyncio
-    @patch('prompts.track_unhandled_request')
-    @patch('prompts.OPENAI_CLIENT')
-    async def test_request_handled_exception(self, mock_openai_client, mock_track):
+    @patch.multiple('prompts', OPENAI_CLIENT=DEFAULT, track_unhandled_request=DEFAULT)
+    async def test_request_handled_exception(self, OPENAI_CLIENT=None, track_unhandled_request=None):
         """Test handling of exceptions during response parsing."""
         from prompts import determine_if_request_handled
         from firebase import User
@@ -384,11 +381,10 @@ class TestDetermineIfRequestHandled:
         # This will cause an AttributeError
         mock_response.choices[0].message = None
 
-        mock_openai_client.chat.completions.create.return_value = mock_response
-
         user = Mock(spec=User)
 
         # The function should catch the exception and return True
+        OPENAI_CLIENT.chat.completions.create.return_value = mock_response
         with patch('builtins.print'):  # Suppress print output during test
             result = await determine_if_request_handled([], user, "chat123", "test")
 
@@ -404,11 +400,11 @@ class TestDetermineIfRequestHandled:
 
         mock_response = Mock()
         mock_response.choices = [Mock()]
-        mock_response.choices[0].message.content = json.dumps({
+        mock_response.choices[0].message.content = orjson.dumps({
             "request_handled": True,
             "capability_requested": None,
             "capability_description": None
-        })
+        }).decode()
 
         mock_openai_client.chat.completions.create.return_value = mock_response
 
@@ -426,13 +422,14 @@ class TestDetermineIfRequestHandled:
         # Verify the conversation text doesn't include transfer functions
         call_args = mock_openai_client.chat.completions.create.call_args
         user_message = call_args[1]["messages"][1]["content"]
-        assert "get_weather" in str(conversation_input)  # Original has it
-        assert "transfer" in str(conversation_input)  # Original has transfer
+        assert "User: Check weather" in user_message
+        assert "transfer_to_weather_agent" not in user_message
 
 
 class TestImportsAndConfiguration:
     """Test module imports and configuration."""
 
+    @pytest.mark.smoke
     def test_imports(self):
         """Test that all required imports work."""
         from prompts import (
@@ -447,15 +444,15 @@ class TestImportsAndConfiguration:
         assert SETTINGS is not None
         assert OPENAI_CLIENT is not None
 
-    @patch('prompts.SETTINGS')
-    @patch('prompts.OPENAI_CLIENT')
-    def test_openai_client_configuration(self, mock_openai_client, mock_settings):
+    @pytest.mark.smoke
+    def test_openai_client_configuration(self):
         """Test that OpenAI client is configured with API key."""
-        # Set up mocks
-        mock_settings.openai_api_key = 'test-openai-key'
+        with patch.multiple('prompts', OPENAI_CLIENT=DEFAULT, SETTINGS=DEFAULT) as mocks:
+            # Set up mocks
+            mocks['SETTINGS'].openai_api_key = 'test-openai-key'
 
-        # Import after patching to ensure mocks are in place
-        from prompts import OPENAI_CLIENT, SETTINGS
+            # Import after patching to ensure mocks are in place
+            from prompts import OPENAI_CLIENT, SETTINGS
 
         assert OPENAI_CLIENT is not None
         assert SETTINGS is not None
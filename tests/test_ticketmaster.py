@@ -5,11 +5,9 @@ Tests cover the Ticketmaster agent, its 7 function tools, and various edge cases
 """
 
 import pytest
-from unittest.mock import Mock, patch, MagicMock
 import json
 import requests
-from agents import Agent, RunContextWrapper
-from agents.realtime import RealtimeAgent
+import connectors.ticketmaster
 from connectors.ticketmaster import (
     TICKETMASTER_AGENT,
     REALTIME_TICKETMASTER_AGENT,
@@ -22,13 +20,375 @@ from connectors.ticketmaster import (
     get_ticketmaster_events_by_venue_id,
     get_ticketmaster_events_by_attraction_id
 )
+from tests.helpers import (
+    INVALID_JSON_RESPONSE, FakeRequests, skip_in_fast_mode, split_url, stub_wrapper
+)
 
 
+# The connector and agent under test, read by the connector_attrs and
+# handoff_description fixtures in conftest.py
+CONNECTOR = connectors.ticketmaster
+AGENT = TICKETMASTER_AGENT
+
+
+@pytest.fixture(scope="session")
+def ticketmaster_tool_index():
+    """Map each exported Ticketmaster tool name to its tool, built once per session."""
+    return {tool.name: tool for tool in ALL_TOOLS}
+
+
+@pytest.fixture(scope="session")
+def agent_tool_names():
+    """Names of the tools registered on TICKETMASTER_AGENT."""
+    return frozenset(tool.name for tool in TICKETMASTER_AGENT.tools)
+
+
+@pytest.fixture(scope="session")
+def realtime_tool_names():
+    """Names of the tools registered on REALTIME_TICKETMASTER_AGENT."""
+    return frozenset(tool.name for tool in REALTIME_TICKETMASTER_AGENT.tools)
+
+
+@pytest.fixture(scope="session")
+def handoff_names():
+    """Names of the agents TICKETMASTER_AGENT can hand off to."""
+    return frozenset(agent.name for agent in TICKETMASTER_AGENT.handoffs)
+
+
+@pytest.fixture(scope="session")
+def tool_schemas(ticketmaster_tool_index):
+    """Parameter JSON schema of each tool, keyed by tool name."""
+    return {name: tool.params_json_schema for name, tool in ticketmaster_tool_index.items()}
+
+
+# Tool inputs, serialized once at import
+_PAYLOAD_EVENTS_NY = json.dumps(
+    {"query": "music", "city": "New York", "stateCode": "NY", "countryCode": "US"})
+_PAYLOAD_EVENT_123 = json.dumps({"eventId": "event123"})
+_PAYLOAD_ATTRACTIONS_TAYLOR = json.dumps({"query": "taylor"})
+_PAYLOAD_VENUES_NY = json.dumps({"query": "arena", "stateCode": "NY", "countryCode": "US"})
+_PAYLOAD_VENUE_123 = json.dumps({"venueId": "venue123"})
+_PAYLOAD_ATTRACTION_123 = json.dumps({"attractionId": "attraction123"})
+_PAYLOAD_EVENTS_NOWHERE = json.dumps(
+    {"query": "invalid_event", "city": "Nowhere", "stateCode": "XX", "countryCode": "US"})
+_PAYLOAD_EVENTS_TEST = json.dumps(
+    {"query": "test", "city": "Test", "stateCode": "TS", "countryCode": "US"})
+_PAYLOAD_EVENT_INVALID = json.dumps({"eventId": "invalid_id"})
+_PAYLOAD_ATTRACTIONS_UNKNOWN = json.dumps({"query": "unknown_artist"})
+_PAYLOAD_VENUES_CA_EMPTY_QUERY = json.dumps({"query": "", "stateCode": "CA", "countryCode": "US"})
+_PAYLOAD_VENUE_INVALID = json.dumps({"venueId": "invalid_venue"})
+_PAYLOAD_VENUE_EMPTY = json.dumps({"venueId": "empty_venue"})
+_PAYLOAD_ATTRACTION_INACTIVE = json.dumps({"attractionId": "inactive_attraction"})
+_PAYLOAD_EVENTS_ROCK_AND_ROLL = json.dumps(
+    {"query": "rock & roll", "city": "Las Vegas", "stateCode": "NV", "countryCode": "US"})
+_PAYLOAD_EVENT_TEST = json.dumps({"eventId": "test123"})
+
+
+# Canned API response data shared across tests; json_response decodes a fresh copy on
+# every json() call, so no test can leak edits into another
+_EVENTS_NEAR_RESPONSE = {
+    "_embedded": {
+        "events": [
+            {
+                "id": "event1",
+                "name": "Concert A",
+                "dates": {"start": {"localDate": "2024-01-15"}},
+                "_embedded": {"venues": [{"name": "Venue A"}]}
+            },
+            {
+                "id": "event2",
+                "name": "Concert B",
+                "dates": {"start": {"localDate": "2024-01-20"}},
+                "_embedded": {"venues": [{"name": "Venue B"}]}
+            }
+        ]
+    }
+}
+
+_EVENT_DETAILS_RESPONSE = {
+    "id": "event123",
+    "name": "Amazing Concert",
+    "description": "A great show",
+    "dates": {
+        "start": {
+            "localDate": "2024-01-15",
+            "localTime": "20:00:00"
+        }
+    },
+    "priceRanges": [
+        {"min": 50.0, "max": 200.0, "currency": "USD"}
+    ],
+    "_embedded": {
+        "venues": [
+            {"name": "Madison Square Garden", "city": {"name": "New York"}}
+        ]
+    }
+}
+
+_ATTRACTIONS_RESPONSE = {
+    "_embedded": {
+        "attractions": [
+            {
+                "id": "attraction1",
+                "name": "Taylor Swift",
+                "type": "attraction",
+                "classifications": [{"segment": {"name": "Music"}}]
+            },
+            {
+                "id": "attraction2",
+                "name": "Ed Sheeran",
+                "type": "attraction",
+                "classifications": [{"segment": {"name": "Music"}}]
+            }
+        ]
+    }
+}
+
+_VENUES_RESPONSE = {
+    "_embedded": {
+        "venues": [
+            {
+                "id": "venue1",
+                "name": "Madison Square Garden",
+                "city": {"name": "New York"},
+                "state": {"name": "New York", "stateCode": "NY"}
+            },
+            {
+                "id": "venue2",
+                "name": "Barclays Center",
+                "city": {"name": "Brooklyn"},
+                "state": {"name": "New York", "stateCode": "NY"}
+            }
+        ]
+    }
+}
+
+_VENUE_DETAILS_RESPONSE = {
+    "id": "venue123",
+    "name": "Madison Square Garden",
+    "description": "The World's Most Famous Arena",
+    "address": {
+        "line1": "4 Pennsylvania Plaza",
+        "line2": ""
+    },
+    "city": {"name": "New York"},
+    "state": {"name": "New York", "stateCode": "NY"},
+    "postalCode": "10001",
+    "parkingDetail": "Multiple parking garages nearby",
+    "generalInfo": {
+        "generalRule": "No outside food or beverages",
+        "childRule": "Children under 2 free"
+    }
+}
+
+_EVENTS_BY_VENUE_RESPONSE = {
+    "_embedded": {
+        "events": [
+            {
+                "id": "event1",
+                "name": "Basketball Game",
+                "dates": {"start": {"localDate": "2024-02-01"}}
+            },
+            {
+                "id": "event2",
+                "name": "Concert",
+                "dates": {"start": {"localDate": "2024-02-05"}}
+            }
+        ]
+    }
+}
+
+_EVENTS_BY_ATTRACTION_RESPONSE = {
+    "_embedded": {
+        "events": [
+            {
+                "id": "event1",
+                "name": "Taylor Swift | The Eras Tour",
+                "dates": {"start": {"localDate": "2024-03-01"}},
+                "_embedded": {"venues": [{"name": "Stadium A"}]}
+            },
+            {
+                "id": "event2",
+                "name": "Taylor Swift | The Eras Tour",
+                "dates": {"start": {"localDate": "2024-03-02"}},
+                "_embedded": {"venues": [{"name": "Stadium A"}]}
+            }
+        ]
+    }
+}
+
+_EMPTY_EVENTS = {"_embedded": {"events": []}}
+_EMPTY_ATTRACTIONS = {"_embedded": {"attractions": []}}
+_EMPTY_VENUES = {"_embedded": {"venues": []}}
+_EVENT_NOT_FOUND = {"error": {"code": "404", "message": "Event not found"}}
+_VENUE_NOT_FOUND = {"error": {"code": "404", "message": "Venue not found"}}
+
+
+@pytest.fixture(scope="session")
+def mock_wrapper():
+    """Shared run context carrying the default consumer key."""
+    return stub_wrapper(ticketmaster_consumer_key="test_key")
+
+
+# Default answer for each URL route, checked in order so the detail routes
+# win over the search routes
+_API_ROUTES = {
+    "events/": {},
+    "venues/": {},
+    "events.json": _EMPTY_EVENTS,
+    "attractions.json": _EMPTY_ATTRACTIONS,
+    "venues.json": _EMPTY_VENUES,
+}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def ticketmaster_api():
+    """Route connectors.ticketmaster HTTP calls to one fake for the whole module."""
+    fake = FakeRequests(_API_ROUTES)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("connectors.ticketmaster.requests", fake)
+        yield fake
+
+
+@pytest.fixture(autouse=True)
+def _reset_ticketmaster_api(ticketmaster_api):
+    """Restore the default routes and clear recorded URLs after each test."""
+    yield
+    ticketmaster_api.reset()
+
+
+# Route each tool's request URL is answered from
+_TOOL_ROUTES = {
+    get_ticketmaster_events_near_location.name: "events.json",
+    get_ticketmaster_event_details.name: "events/",
+    get_ticketmaster_attractions_by_query.name: "attractions.json",
+    find_ticketmaster_venues_near_location.name: "venues.json",
+    get_ticketmaster_venue_details.name: "venues/",
+    get_ticketmaster_events_by_venue_id.name: "events.json",
+    get_ticketmaster_events_by_attraction_id.name: "events.json",
+}
+
+
+async def _invoke(api, tool, wrapper, payload, response_data=None):
+    """Invoke a tool against the fake API, optionally answering its route with response_data."""
+    if response_data is not None:
+        api.respond(_TOOL_ROUTES[tool.name], response_data)
+    return await tool.on_invoke_tool(wrapper, payload)
+
+
+# (tool, payload, canned API response data, response_type, friendly_name, embedded key)
+SUCCESS_CASES = [
+    pytest.param(
+        get_ticketmaster_events_near_location,
+        _PAYLOAD_EVENTS_NY,
+        _EVENTS_NEAR_RESPONSE,
+        'ticketmaster_events_near_location', 'Ticketmaster Event Search', 'events',
+        id="events_near_location"),
+    pytest.param(
+        get_ticketmaster_event_details,
+        _PAYLOAD_EVENT_123,
+        _EVENT_DETAILS_RESPONSE,
+        'ticketmaster_event_details', 'Ticketmaster Event Details', None,
+        id="event_details"),
+    pytest.param(
+        get_ticketmaster_attractions_by_query,
+        _PAYLOAD_ATTRACTIONS_TAYLOR,
+        _ATTRACTIONS_RESPONSE,
+        'ticketmaster_attractions_by_query', 'Ticketmaster Attraction Search', 'attractions',
+        id="attractions_by_query"),
+    pytest.param(
+        find_ticketmaster_venues_near_location,
+        _PAYLOAD_VENUES_NY,
+        _VENUES_RESPONSE,
+        'ticketmaster_venues_near_location', 'Ticketmaster Venue Search', 'venues',
+        id="venues_near_location"),
+    pytest.param(
+        get_ticketmaster_venue_details,
+        _PAYLOAD_VENUE_123,
+        _VENUE_DETAILS_RESPONSE,
+        'ticketmaster_venue_details', 'Ticketmaster Venue Details', None,
+        id="venue_details"),
+    pytest.param(
+        get_ticketmaster_events_by_venue_id,
+        _PAYLOAD_VENUE_123,
+        _EVENTS_BY_VENUE_RESPONSE,
+        'ticketmaster_events_by_venue_id', 'Ticketmaster Events by Venue', 'events',
+        id="events_by_venue_id"),
+    pytest.param(
+        get_ticketmaster_events_by_attraction_id,
+        _PAYLOAD_ATTRACTION_123,
+        _EVENTS_BY_ATTRACTION_RESPONSE,
+        'ticketmaster_events_by_attraction_id', 'Ticketmaster Events by Attraction', 'events',
+        id="events_by_attraction_id"),
+]
+
+# (tool, payload, expected URL path, expected parsed query parameters)
+URL_CASES = [
+    pytest.param(
+        get_ticketmaster_events_near_location,
+        _PAYLOAD_EVENTS_NY,
+        "/discovery/v2/events.json",
+        {"keyword": ["music"], "city": ["New York"], "stateCode": ["NY"], "countryCode": ["US"],
+         "apikey": ["test_key"]},
+        id="events_near_location"),
+    pytest.param(
+        get_ticketmaster_event_details,
+        _PAYLOAD_EVENT_123,
+        "/discovery/v2/events/event123.json",
+        {"apikey": ["test_key"]},
+        id="event_details"),
+    pytest.param(
+        get_ticketmaster_attractions_by_query,
+        _PAYLOAD_ATTRACTIONS_TAYLOR,
+        "/discovery/v2/attractions.json",
+        {"keyword": ["taylor"], "apikey": ["test_key"]},
+        id="attractions_by_query"),
+    pytest.param(
+        find_ticketmaster_venues_near_location,
+        _PAYLOAD_VENUES_NY,
+        "/discovery/v2/venues.json",
+        {"keyword": ["arena"], "stateCode": ["NY"], "countryCode": ["US"], "apikey": ["test_key"]},
+        id="venues_near_location"),
+    pytest.param(
+        get_ticketmaster_venue_details,
+        _PAYLOAD_VENUE_123,
+        "/discovery/v2/venues/venue123.json",
+        {"apikey": ["test_key"]},
+        id="venue_details"),
+    pytest.param(
+        get_ticketmaster_events_by_venue_id,
+        _PAYLOAD_VENUE_123,
+        "/discovery/v2/events.json",
+        {"venueId": ["venue123"], "apikey": ["test_key"]},
+        id="events_by_venue_id"),
+    pytest.param(
+        get_ticketmaster_events_by_attraction_id,
+        _PAYLOAD_ATTRACTION_123,
+        "/discovery/v2/events.json",
+        {"attractionId": ["attraction123"], "apikey": ["test_key"]},
+        id="events_by_attraction_id"),
+]
+
+
+# Keyword groups each tool description must cover, keyed by a fragment of the tool name
+DESC_REQUIREMENTS = {
+    'events_near_location': (('search',), ('events',)),
+    'event_details': (('details',), ('event',)),
+    'attractions': (('attraction', 'artist'),),
+    'venues_near': (('venues',), ('location',)),
+    'venue_details': (('venue',), ('details', 'detailed')),
+    'events_by_venue': (('venue',), ('events',)),
+    'events_by_attraction': (('attraction', 'artist', 'team'), ('events', 'tour')),
+}
+
+
+@skip_in_fast_mode
 class TestTicketmasterConfig:
     """Test Ticketmaster agent configuration."""
 
     def test_ticketmaster_agent_exists(self):
         """Test that TICKETMASTER_AGENT is properly configured."""
+        from agents import Agent
         assert TICKETMASTER_AGENT is not None
         assert isinstance(TICKETMASTER_AGENT, Agent)
         assert TICKETMASTER_AGENT.name == "Ticketmaster"
@@ -36,47 +396,48 @@ class TestTicketmasterConfig:
 
     def test_realtime_ticketmaster_agent_exists(self):
         """Test that REALTIME_TICKETMASTER_AGENT is properly configured."""
+        from agents.realtime import RealtimeAgent
         assert REALTIME_TICKETMASTER_AGENT is not None
         assert isinstance(REALTIME_TICKETMASTER_AGENT, RealtimeAgent)
         assert REALTIME_TICKETMASTER_AGENT.name == "Ticketmaster"
 
-    def test_all_tools_exported(self):
+    def test_all_tools_exported(self, ticketmaster_tool_index):
         """Test that ALL_TOOLS contains expected tools."""
         assert len(ALL_TOOLS) == 7
-        assert get_ticketmaster_events_near_location in ALL_TOOLS
-        assert get_ticketmaster_event_details in ALL_TOOLS
-        assert get_ticketmaster_attractions_by_query in ALL_TOOLS
-        assert find_ticketmaster_venues_near_location in ALL_TOOLS
-        assert get_ticketmaster_venue_details in ALL_TOOLS
-        assert get_ticketmaster_events_by_venue_id in ALL_TOOLS
-        assert get_ticketmaster_events_by_attraction_id in ALL_TOOLS
-
-    def test_agent_tools_configured(self):
+        expected_tools = (
+            get_ticketmaster_events_near_location,
+            get_ticketmaster_event_details,
+            get_ticketmaster_attractions_by_query,
+            find_ticketmaster_venues_near_location,
+            get_ticketmaster_venue_details,
+            get_ticketmaster_events_by_venue_id,
+            get_ticketmaster_events_by_attraction_id,
+        )
+        assert all(ticketmaster_tool_index.get(tool.name) is tool for tool in expected_tools)
+
+    def test_agent_tools_configured(self, agent_tool_names):
         """Test that agent has all tools configured."""
-        agent_tools = TICKETMASTER_AGENT.tools
-        assert len(agent_tools) == 7
-        tool_names = [tool.name for tool in agent_tools]
-        assert 'get_ticketmaster_events_near_location' in tool_names
-        assert 'get_ticketmaster_event_details' in tool_names
-        assert 'get_ticketmaster_attractions_by_query' in tool_names
-        assert 'find_ticketmaster_venues_near_location' in tool_names
-        assert 'get_ticketmaster_venue_details' in tool_names
-        assert 'get_ticketmaster_events_by_venue_id' in tool_names
-        assert 'get_ticketmaster_events_by_attraction_id' in tool_names
-
-    def test_realtime_agent_tools_configured(self):
+        assert len(TICKETMASTER_AGENT.tools) == 7
+        assert agent_tool_names == frozenset({
+            'get_ticketmaster_events_near_location',
+            'get_ticketmaster_event_details',
+            'get_ticketmaster_attractions_by_query',
+            'find_ticketmaster_venues_near_location',
+            'get_ticketmaster_venue_details',
+            'get_ticketmaster_events_by_venue_id',
+            'get_ticketmaster_events_by_attraction_id',
+        })
+
+    def test_realtime_agent_tools_configured(self, realtime_tool_names):
         """Test that realtime agent has all tools configured."""
-        realtime_tools = REALTIME_TICKETMASTER_AGENT.tools
-        assert len(realtime_tools) == 7
+        assert len(REALTIME_TICKETMASTER_AGENT.tools) == 7
+        assert len(realtime_tool_names) == 7
 
-    def test_agent_handoffs_configured(self):
+    def test_agent_handoffs_configured(self, handoff_names):
         """Test that agent handoffs are properly configured."""
         assert hasattr(TICKETMASTER_AGENT, 'handoffs')
         assert len(TICKETMASTER_AGENT.handoffs) == 3
-        handoff_names = [agent.name for agent in TICKETMASTER_AGENT.handoffs]
-        assert "GMail" in handoff_names
-        assert "Google Docs" in handoff_names
-        assert "WeatherAPI" in handoff_names
+        assert handoff_names == frozenset({"GMail", "Google Docs", "WeatherAPI"})
 
     def test_agent_instructions_configured(self):
         """Test that agent instructions are properly set."""
@@ -87,189 +448,90 @@ class TestTicketmasterConfig:
         assert REALTIME_TICKETMASTER_AGENT.instructions is not None
         assert "Ticketmaster assistant" in REALTIME_TICKETMASTER_AGENT.instructions
 
-    def test_agent_handoff_description_configured(self):
+    def test_agent_handoff_description_configured(self, handoff_description):
         """Test that agent handoff description is properly set."""
-        assert TICKETMASTER_AGENT.handoff_description is not None
-        assert "Ticketmaster:" in TICKETMASTER_AGENT.handoff_description
+        assert handoff_description is not None
+        assert "Ticketmaster:" in handoff_description
         from agents.extensions.handoff_prompt import RECOMMENDED_PROMPT_PREFIX
-        assert TICKETMASTER_AGENT.handoff_description.startswith(
-            RECOMMENDED_PROMPT_PREFIX)
+        assert handoff_description[:len(RECOMMENDED_PROMPT_PREFIX)] == RECOMMENDED_PROMPT_PREFIX
 
 
-class TestGetTicketmasterEventsNearLocationTool:
-    """Test the get_ticketmaster_events_near_location function tool."""
+class TestTicketmasterToolSuccess:
+    """Test the success path shared by all seven function tools."""
 
-    @pytest.mark.asyncio
-    async def test_get_events_near_location_success(self):
-        """Test successful event search near location."""
-        mock_ctx = Mock()
-        mock_ctx.settings.ticketmaster_consumer_key = "test_key"
-        mock_wrapper = Mock(spec=RunContextWrapper)
-        mock_wrapper.context = mock_ctx
-
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            "_embedded": {
-                "events": [
-                    {
-                        "id": "event1",
-                        "name": "Concert A",
-                        "dates": {"start": {"localDate": "2024-01-15"}},
-                        "_embedded": {"venues": [{"name": "Venue A"}]}
-                    },
-                    {
-                        "id": "event2",
-                        "name": "Concert B",
-                        "dates": {"start": {"localDate": "2024-01-20"}},
-                        "_embedded": {"venues": [{"name": "Venue B"}]}
-                    }
-                ]
-            }
-        }
+    @pytest.mark.parametrize(
+        "tool, payload, api_response, expected_type, expected_friendly, embedded_key",
+        SUCCESS_CASES)
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_tool_success(self, ticketmaster_api, mock_wrapper, tool, payload, api_response,
+                                expected_type, expected_friendly, embedded_key):
+        """Test that each tool wraps the API response in a ToolResponse envelope."""
+        result = await _invoke(ticketmaster_api, tool, mock_wrapper, payload, api_response)
 
-        with patch('connectors.ticketmaster.requests.get', return_value=mock_response) as mock_get:
-            result = await get_ticketmaster_events_near_location.on_invoke_tool(
-                mock_wrapper,
-                json.dumps({
-                    "query": "music",
-                    "city": "New York",
-                    "stateCode": "NY",
-                    "countryCode": "US"
-                })
-            )
-
-        assert result['response_type'] == 'ticketmaster_events_near_location'
+        assert result['response_type'] == expected_type
         assert result['agent_name'] == 'Ticketmaster'
-        assert result['friendly_name'] == 'Ticketmaster Event Search'
+        assert result['friendly_name'] == expected_friendly
         assert result['display_response'] is True
-        assert len(result['response']) == 2
-        assert result['response'][0]['name'] == "Concert A"
-
-        # Check URL construction
-        call_args = mock_get.call_args[0][0]
-        assert "keyword=music" in call_args
-        assert "city=New York" in call_args
-        assert "stateCode=NY" in call_args
-        assert "countryCode=US" in call_args
-        assert "apikey=test_key" in call_args
-
-    @pytest.mark.asyncio
-    async def test_get_events_near_location_empty_results(self):
-        """Test event search with no results."""
-        mock_ctx = Mock()
-        mock_ctx.settings.ticketmaster_consumer_key = "test_key"
-        mock_wrapper = Mock(spec=RunContextWrapper)
-        mock_wrapper.context = mock_ctx
-
-        mock_response = Mock()
-        mock_response.json.return_value = {"_embedded": {"events": []}}
-
-        with patch('connectors.ticketmaster.requests.get', return_value=mock_response):
-            result = await get_ticketmaster_events_near_location.on_invoke_tool(
-                mock_wrapper,
-                json.dumps({
-                    "query": "invalid_event",
-                    "city": "Nowhere",
-                    "stateCode": "XX",
-                    "countryCode": "US"
-                })
-            )
+        expected = api_response
+        if embedded_key is None:
+            assert result['response'] == expected
+        else:
+            assert result['response'] == expected['_embedded'][embedded_key]
 
-        assert result['response'] == []
+    @pytest.mark.parametrize("tool, payload, expected_path, expected_query", URL_CASES)
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_url_construction(self, ticketmaster_api, mock_wrapper, tool, payload,
+                                    expected_path, expected_query):
+        """Test that each tool builds the expected request URL."""
+        await _invoke(ticketmaster_api, tool, mock_wrapper, payload)
 
-    @pytest.mark.asyncio
-    async def test_get_events_near_location_api_error(self):
-        """Test event search when API returns error."""
-        mock_ctx = Mock()
-        mock_ctx.settings.ticketmaster_consumer_key = "test_key"
-        mock_wrapper = Mock(spec=RunContextWrapper)
-        mock_wrapper.context = mock_ctx
+        path, query = split_url(ticketmaster_api.last_url)
+        assert path == expected_path
+        assert query == expected_query
 
-        with patch('connectors.ticketmaster.requests.get') as mock_get:
-            mock_get.side_effect = requests.RequestException("API Error")
 
-            # The function tool wrapper catches the exception
-            result = await get_ticketmaster_events_near_location.on_invoke_tool(
-                mock_wrapper,
-                json.dumps({
-                    "query": "test",
-                    "city": "Test",
-                    "stateCode": "TS",
-                    "countryCode": "US"
-                })
-            )
+class TestGetTicketmasterEventsNearLocationTool:
+    """Test the get_ticketmaster_events_near_location function tool."""
 
-            # Error is handled by the wrapper
-            assert result is not None
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_get_events_near_location_empty_results(self, ticketmaster_api, mock_wrapper):
+        """Test event search with no results."""
+        ticketmaster_api.respond("events.json", _EMPTY_EVENTS)
 
+        result = await get_ticketmaster_events_near_location.on_invoke_tool(
+            mock_wrapper,
+            _PAYLOAD_EVENTS_NOWHERE
+        )
 
-class TestGetTicketmasterEventDetailsTool:
-    """Test the get_ticketmaster_event_details function tool."""
+        assert result['response'] == []
 
-    @pytest.mark.asyncio
-    async def test_get_event_details_success(self):
-        """Test successful event details retrieval."""
-        mock_ctx = Mock()
-        mock_ctx.settings.ticketmaster_consumer_key = "test_key"
-        mock_wrapper = Mock(spec=RunContextWrapper)
-        mock_wrapper.context = mock_ctx
-
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            "id": "event123",
-            "name": "Amazing Concert",
-            "description": "A great show",
-            "dates": {
-                "start": {
-                    "localDate": "2024-01-15",
-                    "localTime": "20:00:00"
-                }
-            },
-            "priceRanges": [
-                {"min": 50.0, "max": 200.0, "currency": "USD"}
-            ],
-            "_embedded": {
-                "venues": [
-                    {"name": "Madison Square Garden", "city": {"name": "New York"}}
-                ]
-            }
-        }
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_get_events_near_location_api_error(self, ticketmaster_api, mock_wrapper):
+        """Test event search when API returns error."""
+        ticketmaster_api.side_effect = requests.RequestException("API Error")
 
-        with patch('connectors.ticketmaster.requests.get', return_value=mock_response) as mock_get:
-            result = await get_ticketmaster_event_details.on_invoke_tool(
-                mock_wrapper,
-                json.dumps({"eventId": "event123"})
-            )
+        # The function tool wrapper catches the exception
+        result = await get_ticketmaster_events_near_location.on_invoke_tool(
+            mock_wrapper,
+            _PAYLOAD_EVENTS_TEST
+        )
 
-        assert result['response_type'] == 'ticketmaster_event_details'
-        assert result['agent_name'] == 'Ticketmaster'
-        assert result['friendly_name'] == 'Ticketmaster Event Details'
-        assert result['display_response'] is True
-        assert result['response']['name'] == "Amazing Concert"
-        assert result['response']['id'] == "event123"
+        # Error is handled by the wrapper
+        assert result is not None
 
-        # Check URL construction
-        call_args = mock_get.call_args[0][0]
-        assert "events/event123.json" in call_args
-        assert "apikey=test_key" in call_args
 
-    @pytest.mark.asyncio
-    async def test_get_event_details_not_found(self):
-        """Test event details for non-existent event."""
-        mock_ctx = Mock()
-        mock_ctx.settings.ticketmaster_consumer_key = "test_key"
-        mock_wrapper = Mock(spec=RunContextWrapper)
-        mock_wrapper.context = mock_ctx
+class TestGetTicketmasterEventDetailsTool:
+    """Test the get_ticketmaster_event_details function tool."""
 
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            "error": {"code": "404", "message": "Event not found"}}
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_get_event_details_not_found(self, ticketmaster_api, mock_wrapper):
+        """Test event details for non-existent event."""
+        ticketmaster_api.respond("events/", _EVENT_NOT_FOUND)
 
-        with patch('connectors.ticketmaster.requests.get', return_value=mock_response):
-            result = await get_ticketmaster_event_details.on_invoke_tool(
-                mock_wrapper,
-                json.dumps({"eventId": "invalid_id"})
-            )
+        result = await get_ticketmaster_event_details.on_invoke_tool(
+            mock_wrapper,
+            _PAYLOAD_EVENT_INVALID
+        )
 
         assert 'error' in result['response']
 
@@ -277,68 +539,15 @@ class TestGetTicketmasterEventDetailsTool:
 class TestGetTicketmasterAttractionsByQueryTool:
     """Test the get_ticketmaster_attractions_by_query function tool."""
 
-    @pytest.mark.asyncio
-    async def test_get_attractions_success(self):
-        """Test successful attraction search."""
-        mock_ctx = Mock()
-        mock_ctx.settings.ticketmaster_consumer_key = "test_key"
-        mock_wrapper = Mock(spec=RunContextWrapper)
-        mock_wrapper.context = mock_ctx
-
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            "_embedded": {
-                "attractions": [
-                    {
-                        "id": "attraction1",
-                        "name": "Taylor Swift",
-                        "type": "attraction",
-                        "classifications": [{"segment": {"name": "Music"}}]
-                    },
-                    {
-                        "id": "attraction2",
-                        "name": "Ed Sheeran",
-                        "type": "attraction",
-                        "classifications": [{"segment": {"name": "Music"}}]
-                    }
-                ]
-            }
-        }
-
-        with patch('connectors.ticketmaster.requests.get', return_value=mock_response) as mock_get:
-            result = await get_ticketmaster_attractions_by_query.on_invoke_tool(
-                mock_wrapper,
-                json.dumps({"query": "taylor"})
-            )
-
-        assert result['response_type'] == 'ticketmaster_attractions_by_query'
-        assert result['agent_name'] == 'Ticketmaster'
-        assert result['friendly_name'] == 'Ticketmaster Attraction Search'
-        assert len(result['response']) == 2
-        assert result['response'][0]['name'] == "Taylor Swift"
-
-        # Check URL construction
-        call_args = mock_get.call_args[0][0]
-        assert "attractions.json" in call_args
-        assert "keyword=taylor" in call_args
-        assert "apikey=test_key" in call_args
-
-    @pytest.mark.asyncio
-    async def test_get_attractions_no_results(self):
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_get_attractions_no_results(self, ticketmaster_api, mock_wrapper):
         """Test attraction search with no results."""
-        mock_ctx = Mock()
-        mock_ctx.settings.ticketmaster_consumer_key = "test_key"
-        mock_wrapper = Mock(spec=RunContextWrapper)
-        mock_wrapper.context = mock_ctx
-
-        mock_response = Mock()
-        mock_response.json.return_value = {"_embedded": {"attractions": []}}
+        ticketmaster_api.respond("attractions.json", _EMPTY_ATTRACTIONS)
 
-        with patch('connectors.ticketmaster.requests.get', return_value=mock_response):
-            result = await get_ticketmaster_attractions_by_query.on_invoke_tool(
-                mock_wrapper,
-                json.dumps({"query": "unknown_artist"})
-            )
+        result = await get_ticketmaster_attractions_by_query.on_invoke_tool(
+            mock_wrapper,
+            _PAYLOAD_ATTRACTIONS_UNKNOWN
+        )
 
         assert result['response'] == []
 
@@ -346,78 +555,15 @@ class TestGetTicketmasterAttractionsByQueryTool:
 class TestFindTicketmasterVenuesNearLocationTool:
     """Test the find_ticketmaster_venues_near_location function tool."""
 
-    @pytest.mark.asyncio
-    async def test_find_venues_success(self):
-        """Test successful venue search."""
-        mock_ctx = Mock()
-        mock_ctx.settings.ticketmaster_consumer_key = "test_key"
-        mock_wrapper = Mock(spec=RunContextWrapper)
-        mock_wrapper.context = mock_ctx
-
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            "_embedded": {
-                "venues": [
-                    {
-                        "id": "venue1",
-                        "name": "Madison Square Garden",
-                        "city": {"name": "New York"},
-                        "state": {"name": "New York", "stateCode": "NY"}
-                    },
-                    {
-                        "id": "venue2",
-                        "name": "Barclays Center",
-                        "city": {"name": "Brooklyn"},
-                        "state": {"name": "New York", "stateCode": "NY"}
-                    }
-                ]
-            }
-        }
-
-        with patch('connectors.ticketmaster.requests.get', return_value=mock_response) as mock_get:
-            result = await find_ticketmaster_venues_near_location.on_invoke_tool(
-                mock_wrapper,
-                json.dumps({
-                    "query": "arena",
-                    "stateCode": "NY",
-                    "countryCode": "US"
-                })
-            )
-
-        assert result['response_type'] == 'ticketmaster_venues_near_location'
-        assert result['agent_name'] == 'Ticketmaster'
-        assert result['friendly_name'] == 'Ticketmaster Venue Search'
-        assert len(result['response']) == 2
-        assert result['response'][0]['name'] == "Madison Square Garden"
-
-        # Check URL construction
-        call_args = mock_get.call_args[0][0]
-        assert "venues.json" in call_args
-        assert "keyword=arena" in call_args
-        assert "stateCode=NY" in call_args
-        assert "countryCode=US" in call_args
-        assert "apikey=test_key" in call_args
-
-    @pytest.mark.asyncio
-    async def test_find_venues_empty_query(self):
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_find_venues_empty_query(self, ticketmaster_api, mock_wrapper):
         """Test venue search with empty query."""
-        mock_ctx = Mock()
-        mock_ctx.settings.ticketmaster_consumer_key = "test_key"
-        mock_wrapper = Mock(spec=RunContextWrapper)
-        mock_wrapper.context = mock_ctx
-
-        mock_response = Mock()
-        mock_response.json.return_value = {"_embedded": {"venues": []}}
-
-        with patch('connectors.ticketmaster.requests.get', return_value=mock_response):
-            result = await find_ticketmaster_venues_near_location.on_invoke_tool(
-                mock_wrapper,
-                json.dumps({
-                    "query": "",
-                    "stateCode": "CA",
-                    "countryCode": "US"
-                })
-            )
+        ticketmaster_api.respond("venues.json", _EMPTY_VENUES)
+
+        result = await find_ticketmaster_venues_near_location.on_invoke_tool(
+            mock_wrapper,
+            _PAYLOAD_VENUES_CA_EMPTY_QUERY
+        )
 
         assert result['response'] == []
 
@@ -425,67 +571,15 @@ class TestFindTicketmasterVenuesNearLocationTool:
 class TestGetTicketmasterVenueDetailsTool:
     """Test the get_ticketmaster_venue_details function tool."""
 
-    @pytest.mark.asyncio
-    async def test_get_venue_details_success(self):
-        """Test successful venue details retrieval."""
-        mock_ctx = Mock()
-        mock_ctx.settings.ticketmaster_consumer_key = "test_key"
-        mock_wrapper = Mock(spec=RunContextWrapper)
-        mock_wrapper.context = mock_ctx
-
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            "id": "venue123",
-            "name": "Madison Square Garden",
-            "description": "The World's Most Famous Arena",
-            "address": {
-                "line1": "4 Pennsylvania Plaza",
-                "line2": ""
-            },
-            "city": {"name": "New York"},
-            "state": {"name": "New York", "stateCode": "NY"},
-            "postalCode": "10001",
-            "parkingDetail": "Multiple parking garages nearby",
-            "generalInfo": {
-                "generalRule": "No outside food or beverages",
-                "childRule": "Children under 2 free"
-            }
-        }
-
-        with patch('connectors.ticketmaster.requests.get', return_value=mock_response) as mock_get:
-            result = await get_ticketmaster_venue_details.on_invoke_tool(
-                mock_wrapper,
-                json.dumps({"venueId": "venue123"})
-            )
-
-        assert result['response_type'] == 'ticketmaster_venue_details'
-        assert result['agent_name'] == 'Ticketmaster'
-        assert result['friendly_name'] == 'Ticketmaster Venue Details'
-        assert result['response']['name'] == "Madison Square Garden"
-        assert result['response']['id'] == "venue123"
-
-        # Check URL construction
-        call_args = mock_get.call_args[0][0]
-        assert "venues/venue123.json" in call_args
-        assert "apikey=test_key" in call_args
-
-    @pytest.mark.asyncio
-    async def test_get_venue_details_not_found(self):
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_get_venue_details_not_found(self, ticketmaster_api, mock_wrapper):
         """Test venue details for non-existent venue."""
-        mock_ctx = Mock()
-        mock_ctx.settings.ticketmaster_consumer_key = "test_key"
-        mock_wrapper = Mock(spec=RunContextWrapper)
-        mock_wrapper.context = mock_ctx
+        ticketmaster_api.respond("venues/", _VENUE_NOT_FOUND)
 
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            "error": {"code": "404", "message": "Venue not found"}}
-
-        with patch('connectors.ticketmaster.requests.get', return_value=mock_response):
-            result = await get_ticketmaster_venue_details.on_invoke_tool(
-                mock_wrapper,
-                json.dumps({"venueId": "invalid_venue"})
-            )
+        result = await get_ticketmaster_venue_details.on_invoke_tool(
+            mock_wrapper,
+            _PAYLOAD_VENUE_INVALID
+        )
 
         assert 'error' in result['response']
 
@@ -493,66 +587,15 @@ class TestGetTicketmasterVenueDetailsTool:
 class TestGetTicketmasterEventsByVenueIdTool:
     """Test the get_ticketmaster_events_by_venue_id function tool."""
 
-    @pytest.mark.asyncio
-    async def test_get_events_by_venue_success(self):
-        """Test successful event retrieval by venue ID."""
-        mock_ctx = Mock()
-        mock_ctx.settings.ticketmaster_consumer_key = "test_key"
-        mock_wrapper = Mock(spec=RunContextWrapper)
-        mock_wrapper.context = mock_ctx
-
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            "_embedded": {
-                "events": [
-                    {
-                        "id": "event1",
-                        "name": "Basketball Game",
-                        "dates": {"start": {"localDate": "2024-02-01"}}
-                    },
-                    {
-                        "id": "event2",
-                        "name": "Concert",
-                        "dates": {"start": {"localDate": "2024-02-05"}}
-                    }
-                ]
-            }
-        }
-
-        with patch('connectors.ticketmaster.requests.get', return_value=mock_response) as mock_get:
-            result = await get_ticketmaster_events_by_venue_id.on_invoke_tool(
-                mock_wrapper,
-                json.dumps({"venueId": "venue123"})
-            )
-
-        assert result['response_type'] == 'ticketmaster_events_by_venue_id'
-        assert result['agent_name'] == 'Ticketmaster'
-        assert result['friendly_name'] == 'Ticketmaster Events by Venue'
-        assert len(result['response']) == 2
-        assert result['response'][0]['name'] == "Basketball Game"
-
-        # Check URL construction
-        call_args = mock_get.call_args[0][0]
-        assert "events.json" in call_args
-        assert "venueId=venue123" in call_args
-        assert "apikey=test_key" in call_args
-
-    @pytest.mark.asyncio
-    async def test_get_events_by_venue_no_events(self):
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_get_events_by_venue_no_events(self, ticketmaster_api, mock_wrapper):
         """Test events by venue when venue has no events."""
-        mock_ctx = Mock()
-        mock_ctx.settings.ticketmaster_consumer_key = "test_key"
-        mock_wrapper = Mock(spec=RunContextWrapper)
-        mock_wrapper.context = mock_ctx
-
-        mock_response = Mock()
-        mock_response.json.return_value = {"_embedded": {"events": []}}
+        ticketmaster_api.respond("events.json", _EMPTY_EVENTS)
 
-        with patch('connectors.ticketmaster.requests.get', return_value=mock_response):
-            result = await get_ticketmaster_events_by_venue_id.on_invoke_tool(
-                mock_wrapper,
-                json.dumps({"venueId": "empty_venue"})
-            )
+        result = await get_ticketmaster_events_by_venue_id.on_invoke_tool(
+            mock_wrapper,
+            _PAYLOAD_VENUE_EMPTY
+        )
 
         assert result['response'] == []
 
@@ -560,68 +603,15 @@ class TestGetTicketmasterEventsByVenueIdTool:
 class TestGetTicketmasterEventsByAttractionIdTool:
     """Test the get_ticketmaster_events_by_attraction_id function tool."""
 
-    @pytest.mark.asyncio
-    async def test_get_events_by_attraction_success(self):
-        """Test successful event retrieval by attraction ID."""
-        mock_ctx = Mock()
-        mock_ctx.settings.ticketmaster_consumer_key = "test_key"
-        mock_wrapper = Mock(spec=RunContextWrapper)
-        mock_wrapper.context = mock_ctx
-
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            "_embedded": {
-                "events": [
-                    {
-                        "id": "event1",
-                        "name": "Taylor Swift | The Eras Tour",
-                        "dates": {"start": {"localDate": "2024-03-01"}},
-                        "_embedded": {"venues": [{"name": "Stadium A"}]}
-                    },
-                    {
-                        "id": "event2",
-                        "name": "Taylor Swift | The Eras Tour",
-                        "dates": {"start": {"localDate": "2024-03-02"}},
-                        "_embedded": {"venues": [{"name": "Stadium A"}]}
-                    }
-                ]
-            }
-        }
-
-        with patch('connectors.ticketmaster.requests.get', return_value=mock_response) as mock_get:
-            result = await get_ticketmaster_events_by_attraction_id.on_invoke_tool(
-                mock_wrapper,
-                json.dumps({"attractionId": "attraction123"})
-            )
-
-        assert result['response_type'] == 'ticketmaster_events_by_attraction_id'
-        assert result['agent_name'] == 'Ticketmaster'
-        assert result['friendly_name'] == 'Ticketmaster Events by Attraction'
-        assert len(result['response']) == 2
-        assert "Taylor Swift" in result['response'][0]['name']
-
-        # Check URL construction
-        call_args = mock_get.call_args[0][0]
-        assert "events.json" in call_args
-        assert "attractionId=attraction123" in call_args
-        assert "apikey=test_key" in call_args
-
-    @pytest.mark.asyncio
-    async def test_get_events_by_attraction_no_events(self):
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_get_events_by_attraction_no_events(self, ticketmaster_api, mock_wrapper):
         """Test events by attraction when attraction has no upcoming events."""
-        mock_ctx = Mock()
-        mock_ctx.settings.ticketmaster_consumer_key = "test_key"
-        mock_wrapper = Mock(spec=RunContextWrapper)
-        mock_wrapper.context = mock_ctx
+        ticketmaster_api.respond("events.json", _EMPTY_EVENTS)
 
-        mock_response = Mock()
-        mock_response.json.return_value = {"_embedded": {"events": []}}
-
-        with patch('connectors.ticketmaster.requests.get', return_value=mock_response):
-            result = await get_ticketmaster_events_by_attraction_id.on_invoke_tool(
-                mock_wrapper,
-                json.dumps({"attractionId": "inactive_attraction"})
-            )
+        result = await get_ticketmaster_events_by_attraction_id.on_invoke_tool(
+            mock_wrapper,
+            _PAYLOAD_ATTRACTION_INACTIVE
+        )
 
         assert result['response'] == []
 
@@ -629,227 +619,102 @@ class TestGetTicketmasterEventsByAttractionIdTool:
 class TestTicketmasterIntegration:
     """Integration tests for Ticketmaster components."""
 
-    def test_all_imports_work(self):
+    def test_all_imports_work(self, connector_attrs):
         """Test that all imports work correctly."""
-        try:
-            from connectors.ticketmaster import (
-                TICKETMASTER_AGENT,
-                REALTIME_TICKETMASTER_AGENT,
-                ALL_TOOLS,
-                get_ticketmaster_events_near_location,
-                get_ticketmaster_event_details,
-                get_ticketmaster_attractions_by_query,
-                find_ticketmaster_venues_near_location,
-                get_ticketmaster_venue_details,
-                get_ticketmaster_events_by_venue_id,
-                get_ticketmaster_events_by_attraction_id
-            )
-
-            assert TICKETMASTER_AGENT is not None
-            assert REALTIME_TICKETMASTER_AGENT is not None
-            assert len(ALL_TOOLS) == 7
-
-            # Verify all tools have on_invoke_tool method
-            for tool in ALL_TOOLS:
-                assert hasattr(tool, 'on_invoke_tool')
-                assert callable(tool.on_invoke_tool)
-
-        except ImportError as e:
-            pytest.fail(f"Failed to import Ticketmaster components: {e}")
-
-    def test_agent_tools_consistency(self):
-        """Test that agent tools match ALL_TOOLS."""
-        agent_tool_names = [tool.name for tool in TICKETMASTER_AGENT.tools]
-        realtime_tool_names = [
-            tool.name for tool in REALTIME_TICKETMASTER_AGENT.tools]
-        all_tool_names = [tool.name for tool in ALL_TOOLS]
-
-        assert set(agent_tool_names) == set(all_tool_names)
-        assert set(realtime_tool_names) == set(all_tool_names)
+        assert {"TICKETMASTER_AGENT", "REALTIME_TICKETMASTER_AGENT", "ALL_TOOLS"} <= connector_attrs
+        assert TICKETMASTER_AGENT is not None
+        assert REALTIME_TICKETMASTER_AGENT is not None
+        assert len(ALL_TOOLS) == 7
 
-    def test_tool_descriptions(self):
-        """Test that all tools have proper descriptions."""
+        # Verify all tools have on_invoke_tool method
         for tool in ALL_TOOLS:
-            assert hasattr(tool, 'description')
-            assert tool.description is not None
-            assert len(tool.description) > 0
-
-            # Check for specific keywords in descriptions
-            desc_lower = tool.description.lower()
-            if 'events_near_location' in tool.name:
-                assert 'search' in desc_lower and 'events' in desc_lower
-            elif 'event_details' in tool.name:
-                assert 'details' in desc_lower and 'event' in desc_lower
-            elif 'attractions' in tool.name:
-                assert 'attraction' in desc_lower or 'artist' in desc_lower
-            elif 'venues_near' in tool.name:
-                assert 'venues' in desc_lower and 'location' in desc_lower
-            elif 'venue_details' in tool.name:
-                assert 'venue' in desc_lower and (
-                    'details' in desc_lower or 'detailed' in desc_lower)
-            elif 'events_by_venue' in tool.name:
-                assert 'venue' in desc_lower and 'events' in desc_lower
-            elif 'events_by_attraction' in tool.name:
-                assert ('attraction' in desc_lower or 'artist' in desc_lower or 'team' in desc_lower) and (
-                    'events' in desc_lower or 'tour' in desc_lower)
-
-    def test_tool_parameters(self):
+            assert hasattr(tool, 'on_invoke_tool')
+            assert callable(tool.on_invoke_tool)
+
+    def test_agent_tools_consistency(self, ticketmaster_tool_index, agent_tool_names, realtime_tool_names):
+        """Test that agent tools match ALL_TOOLS."""
+        assert agent_tool_names == ticketmaster_tool_index.keys()
+        assert realtime_tool_names == ticketmaster_tool_index.keys()
+
+    @pytest.mark.parametrize("tool", ALL_TOOLS, ids=[tool.name for tool in ALL_TOOLS])
+    def test_tool_descriptions(self, tool):
+        """Test that each tool has a description mentioning what it does."""
+        assert tool.description
+
+        # Every keyword group must have at least one keyword in the description
+        matches = [groups for fragment, groups in DESC_REQUIREMENTS.items()
+                   if fragment in tool.name]
+        assert len(matches) == 1, tool.name
+        desc_lower = tool.description.lower()
+        assert all(any(keyword in desc_lower for keyword in group)
+                   for group in matches[0])
+
+    def test_tool_parameters(self, tool_schemas):
         """Test that all tools have correct parameter schemas."""
-        # Test get_ticketmaster_events_near_location parameters
-        events_schema = get_ticketmaster_events_near_location.params_json_schema
-        assert 'properties' in events_schema
-        assert 'query' in events_schema['properties']
-        assert 'city' in events_schema['properties']
-        assert 'stateCode' in events_schema['properties']
-        assert 'countryCode' in events_schema['properties']
-
-        # Test get_ticketmaster_event_details parameters
-        details_schema = get_ticketmaster_event_details.params_json_schema
-        assert 'properties' in details_schema
-        assert 'eventId' in details_schema['properties']
-
-        # Test get_ticketmaster_attractions_by_query parameters
-        attractions_schema = get_ticketmaster_attractions_by_query.params_json_schema
-        assert 'properties' in attractions_schema
-        assert 'query' in attractions_schema['properties']
-
-        # Test find_ticketmaster_venues_near_location parameters
-        venues_schema = find_ticketmaster_venues_near_location.params_json_schema
-        assert 'properties' in venues_schema
-        assert 'query' in venues_schema['properties']
-        assert 'stateCode' in venues_schema['properties']
-        assert 'countryCode' in venues_schema['properties']
-
-        # Test get_ticketmaster_venue_details parameters
-        venue_details_schema = get_ticketmaster_venue_details.params_json_schema
-        assert 'properties' in venue_details_schema
-        assert 'venueId' in venue_details_schema['properties']
-
-        # Test get_ticketmaster_events_by_venue_id parameters
-        events_by_venue_schema = get_ticketmaster_events_by_venue_id.params_json_schema
-        assert 'properties' in events_by_venue_schema
-        assert 'venueId' in events_by_venue_schema['properties']
-
-        # Test get_ticketmaster_events_by_attraction_id parameters
-        events_by_attraction_schema = get_ticketmaster_events_by_attraction_id.params_json_schema
-        assert 'properties' in events_by_attraction_schema
-        assert 'attractionId' in events_by_attraction_schema['properties']
+        expected_params = {
+            'get_ticketmaster_events_near_location': {'query', 'city', 'stateCode', 'countryCode'},
+            'get_ticketmaster_event_details': {'eventId'},
+            'get_ticketmaster_attractions_by_query': {'query'},
+            'find_ticketmaster_venues_near_location': {'query', 'stateCode', 'countryCode'},
+            'get_ticketmaster_venue_details': {'venueId'},
+            'get_ticketmaster_events_by_venue_id': {'venueId'},
+            'get_ticketmaster_events_by_attraction_id': {'attractionId'},
+        }
+        for name, params in expected_params.items():
+            assert 'properties' in tool_schemas[name]
+            assert params <= tool_schemas[name]['properties'].keys()
 
 
 class TestTicketmasterEdgeCases:
     """Test edge cases and error conditions."""
 
-    @pytest.mark.asyncio
-    async def test_events_near_location_special_characters(self):
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_events_near_location_special_characters(self, ticketmaster_api, mock_wrapper):
         """Test event search with special characters in query."""
-        mock_ctx = Mock()
-        mock_ctx.settings.ticketmaster_consumer_key = "test_key"
-        mock_wrapper = Mock(spec=RunContextWrapper)
-        mock_wrapper.context = mock_ctx
-
-        mock_response = Mock()
-        mock_response.json.return_value = {"_embedded": {"events": []}}
-
-        with patch('connectors.ticketmaster.requests.get', return_value=mock_response) as mock_get:
-            result = await get_ticketmaster_events_near_location.on_invoke_tool(
-                mock_wrapper,
-                json.dumps({
-                    "query": "rock & roll",
-                    "city": "Las Vegas",
-                    "stateCode": "NV",
-                    "countryCode": "US"
-                })
-            )
+        ticketmaster_api.respond("events.json", _EMPTY_EVENTS)
+
+        result = await get_ticketmaster_events_near_location.on_invoke_tool(
+            mock_wrapper,
+            _PAYLOAD_EVENTS_ROCK_AND_ROLL
+        )
 
         # Check that special characters are handled in URL
-        call_args = mock_get.call_args[0][0]
+        call_args = ticketmaster_api.last_url
         assert "rock & roll" in call_args or "rock%20%26%20roll" in call_args
 
-    @pytest.mark.asyncio
-    async def test_api_key_configuration(self):
-        """Test that API key is properly passed from settings."""
-        mock_ctx = Mock()
-        mock_ctx.settings.ticketmaster_consumer_key = "my_test_api_key"
-        mock_wrapper = Mock(spec=RunContextWrapper)
-        mock_wrapper.context = mock_ctx
-
-        mock_response = Mock()
-        mock_response.json.return_value = {"_embedded": {"events": []}}
-
-        with patch('connectors.ticketmaster.requests.get', return_value=mock_response) as mock_get:
-            await get_ticketmaster_events_near_location.on_invoke_tool(
-                mock_wrapper,
-                json.dumps({
-                    "query": "test",
-                    "city": "Test",
-                    "stateCode": "TS",
-                    "countryCode": "US"
-                })
-            )
-
-        call_args = mock_get.call_args[0][0]
-        assert "apikey=my_test_api_key" in call_args
-
-    @pytest.mark.asyncio
-    async def test_empty_embedded_response(self):
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_empty_embedded_response(self, ticketmaster_api, mock_wrapper):
         """Test handling of response without _embedded field."""
-        mock_ctx = Mock()
-        mock_ctx.settings.ticketmaster_consumer_key = "test_key"
-        mock_wrapper = Mock(spec=RunContextWrapper)
-        mock_wrapper.context = mock_ctx
-
-        mock_response = Mock()
         # Response without _embedded field
-        mock_response.json.return_value = {"page": {"totalElements": 0}}
-
-        with patch('connectors.ticketmaster.requests.get', return_value=mock_response):
-            # The function tool catches KeyError internally
-            result = await get_ticketmaster_events_near_location.on_invoke_tool(
-                mock_wrapper,
-                json.dumps({
-                    "query": "test",
-                    "city": "Test",
-                    "stateCode": "TS",
-                    "countryCode": "US"
-                })
-            )
-
-            # Error is handled internally by the function tool wrapper
-            assert result is not None
-
-    @pytest.mark.asyncio
-    async def test_json_decode_error(self):
-        """Test handling of invalid JSON response."""
-        mock_ctx = Mock()
-        mock_ctx.settings.ticketmaster_consumer_key = "test_key"
-        mock_wrapper = Mock(spec=RunContextWrapper)
-        mock_wrapper.context = mock_ctx
+        ticketmaster_api.respond("events.json", {"page": {"totalElements": 0}})
+
+        # The function tool catches KeyError internally
+        result = await get_ticketmaster_events_near_location.on_invoke_tool(
+            mock_wrapper,
+            _PAYLOAD_EVENTS_TEST
+        )
 
-        mock_response = Mock()
-        mock_response.json.side_effect = ValueError("Invalid JSON")
+        # Error is handled internally by the function tool wrapper
+        assert result is not None
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_json_decode_error(self, ticketmaster_api, mock_wrapper):
+        """Test handling of invalid JSON response."""
+        ticketmaster_api.responses["events/"] = INVALID_JSON_RESPONSE
 
-        with patch('connectors.ticketmaster.requests.get', return_value=mock_response):
-            # The function tool catches the ValueError internally
-            result = await get_ticketmaster_event_details.on_invoke_tool(
-                mock_wrapper,
-                json.dumps({"eventId": "test123"})
-            )
+        # The function tool catches the ValueError internally
+        result = await get_ticketmaster_event_details.on_invoke_tool(
+            mock_wrapper,
+            _PAYLOAD_EVENT_TEST
+        )
 
-            # Error is handled internally by the function tool wrapper
-            assert result is not None
+        # Error is handled internally by the function tool wrapper
+        assert result is not None
 
-    def test_unused_imports(self):
+    def test_unused_imports(self, connector_attrs):
         """Test that imports are present in the module."""
-        import connectors.ticketmaster as ticketmaster_module
-
-        # Check that all expected imports are available
-        assert hasattr(ticketmaster_module, 'Agent')
-        assert hasattr(ticketmaster_module, 'function_tool')
-        assert hasattr(ticketmaster_module, 'RunContextWrapper')
-        assert hasattr(ticketmaster_module, 'RealtimeAgent')
-        assert hasattr(ticketmaster_module, 'requests')
-        assert hasattr(ticketmaster_module, 'ChatContext')
-        assert hasattr(ticketmaster_module, 'ToolResponse')
-        assert hasattr(ticketmaster_module, 'GMAIL_AGENT')
-        assert hasattr(ticketmaster_module, 'GOOGLE_DOCS_AGENT')
-        assert hasattr(ticketmaster_module, 'WEATHERAPI_AGENT')
+        assert {
+            "Agent", "function_tool", "RunContextWrapper", "RealtimeAgent", "requests",
+            "ChatContext", "ToolResponse", "GMAIL_AGENT", "GOOGLE_DOCS_AGENT",
+            "WEATHERAPI_AGENT",
+        } <= connector_attrs
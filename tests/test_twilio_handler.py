@@ -3,12 +3,56 @@ import base64
 import json
 import time
 from datetime import datetime
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import orjson
 import pytest
 from fastapi import WebSocket
 
-from routers.twilio_handler import TwilioHandler, logger
+from routers.twilio_handler import MAX_OUTBOUND_FRAMES, TwilioHandler, logger
+
+
+# Audio payloads, encoded once at import
+_AUDIO_400 = b"x" * 400  # Exactly BUFFER_SIZE_BYTES
+_ENCODED_400 = base64.b64encode(_AUDIO_400).decode("utf-8")
+_AUDIO_100 = b"x" * 100  # Less than BUFFER_SIZE_BYTES
+_ENCODED_100 = base64.b64encode(_AUDIO_100).decode("utf-8")
+_TEST_AUDIO = b"test audio data"
+_ENCODED_TEST_AUDIO = base64.b64encode(_TEST_AUDIO).decode("utf-8")
+
+_MEDIA_MSG_400 = {"event": "media", "media": {"payload": _ENCODED_400}}
+_MEDIA_MSG_100 = {"event": "media", "media": {"payload": _ENCODED_100}}
+_MEDIA_MSG_TEST_AUDIO = {"event": "media", "media": {"payload": _ENCODED_TEST_AUDIO}}
+
+# Read-only realtime audio events; the handler never mutates them
+_AUDIO_EVENTS = tuple(
+    SimpleNamespace(
+        type="audio",
+        audio=SimpleNamespace(data=f"audio{i}".encode(), item_id=f"item-{i}", content_index=i),
+    )
+    for i in range(5)
+)
+
+
+class _AsyncList:
+    """Async iterator over ``seq``; raises ``raise_exc()`` instead if given."""
+    __slots__ = ("_it", "_raise")
+
+    def __init__(self, seq, raise_exc=None):
+        self._it = iter(seq)
+        self._raise = raise_exc
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._raise:
+            raise self._raise()
+        try:
+            return next(self._it)
+        except StopIteration:
+            raise StopAsyncIteration
 
 
 @pytest.fixture
@@ -60,14 +104,54 @@ def mock_user():
     return user
 
 
+@pytest.fixture(autouse=True)
+def _patched_client():
+    """Patch the Twilio REST Client with a fresh mock for each test."""
+    with patch('routers.twilio_handler.Client') as client_class:
+        yield client_class
+
+
+@pytest.fixture
+def handler(mock_websocket, mock_user, mock_settings):
+    """Create a TwilioHandler around the per-test websocket, with Settings patched."""
+    return TwilioHandler(mock_websocket, mock_user)
+
+
+# (event type, MagicMock attributes, assertion on (logger, websocket)) per realtime event
+REALTIME_EVENT_CASES = [
+    pytest.param(
+        "agent_end", {"agent.name": "TestAgent"},
+        lambda log, ws: log.info.assert_called_once_with("Agent ended: TestAgent"),
+        id="agent_end"),
+    pytest.param(
+        "handoff", {"from_agent.name": "Agent1", "to_agent.name": "Agent2"},
+        lambda log, ws: log.info.assert_called_once_with("Handoff from Agent1 to Agent2"),
+        id="handoff"),
+    pytest.param(
+        "tool_end", {"tool.name": "TestTool", "output": "Test output"},
+        lambda log, ws: log.debug.assert_called_once_with("Tool ended: TestTool; output: Test output"),
+        id="tool_end"),
+    pytest.param(
+        "audio_end", {},
+        lambda log, ws: log.debug.assert_called_with("Audio end"),
+        id="audio_end"),
+    pytest.param(
+        "audio_interrupted", {},
+        lambda log, ws: ws.send_text.assert_called_once_with(
+            orjson.dumps({"event": "clear", "streamSid": "test-stream-sid"}).decode()),
+        id="audio_interrupted"),
+    pytest.param(
+        "unknown_event", {},
+        lambda log, ws: (ws.send_text.assert_not_called(), ws.send_json.assert_not_called()),
+        id="unknown"),
+]
+
+
 class TestTwilioHandler:
     """Test cases for TwilioHandler class."""
     
-    def test_init(self, mock_websocket, mock_user):
+    def test_init(self, handler, mock_websocket):
         """Test TwilioHandler initialization."""
-        with patch('routers.twilio_handler.Client'):
-            handler = TwilioHandler(mock_websocket, mock_user)
-        
         assert handler.twilio_websocket == mock_websocket
         assert handler._message_loop_task is None
         assert handler.session is None
@@ -81,21 +165,20 @@ class TestTwilioHandler:
         assert handler.BUFFER_SIZE_BYTES == 400
         
         assert handler._stream_sid is None
-        assert isinstance(handler._audio_buffer, bytearray)
+        assert len(handler._audio_buffer) == handler.BUFFER_SIZE_BYTES * 2
+        assert handler._write_pos == handler._read_pos == 0
         assert handler._mark_counter == 0
         assert isinstance(handler._mark_data, dict)
     
     @pytest.mark.asyncio
-    async def test_start_success(self, mock_websocket, mock_user, mock_settings, mock_runner, mock_realtime_session):
+    async def test_start_success(self, handler, mock_websocket, mock_settings, mock_runner, mock_realtime_session):
         """Test successful session start."""
-        handler = TwilioHandler(mock_websocket, mock_user)
-        
         # Mock the runner.run method to return our mock session
         mock_runner.run = AsyncMock(return_value=mock_realtime_session)
         
         # Mock asyncio tasks
         with patch('asyncio.create_task') as mock_create_task:
-            mock_tasks = [MagicMock(), MagicMock(), MagicMock()]
+            mock_tasks = [MagicMock() for _ in range(4)]
             mock_create_task.side_effect = mock_tasks
             
             await handler.start()
@@ -108,47 +191,38 @@ class TestTwilioHandler:
         mock_realtime_session.enter.assert_called_once()
         
         # Verify tasks were created
-        assert mock_create_task.call_count == 3
+        assert mock_create_task.call_count == 4
         assert handler._realtime_session_task == mock_tasks[0]
         assert handler._message_loop_task == mock_tasks[1]
         assert handler._buffer_flush_task == mock_tasks[2]
+        assert handler._writer_task == mock_tasks[3]
     
     @pytest.mark.asyncio
-    async def test_start_no_api_key(self, mock_websocket, mock_user):
+    async def test_start_no_api_key(self, handler):
         """Test start fails without API key."""
-        with patch('routers.twilio_handler.Client'):
-            handler = TwilioHandler(mock_websocket, mock_user)
-            
-            # Override the settings to have no API key
-            handler.settings = MagicMock()
-            handler.settings.openai_api_key = None
-            
-            # Test will raise when trying to get openai_api_key
-            with pytest.raises(ValueError, match="OPENAI_API_KEY environment variable is required"):
-                await handler.start()
+        # Override the settings to have no API key
+        handler.settings = MagicMock()
+        handler.settings.openai_api_key = None
+        
+        # Test will raise when trying to get openai_api_key
+        with pytest.raises(ValueError, match="OPENAI_API_KEY environment variable is required"):
+            await handler.start()
     
     @pytest.mark.asyncio
-    async def test_wait_until_done(self, mock_websocket, mock_user):
+    async def test_wait_until_done(self, handler):
         """Test wait_until_done method."""
-        handler = TwilioHandler(mock_websocket, mock_user)
-        
-        # Create a mock task that can be awaited
-        async def mock_coro():
-            pass
-        
-        mock_task = asyncio.create_task(mock_coro())
-        handler._message_loop_task = mock_task
+        # An already-completed future stands in for the message loop task
+        fut = asyncio.get_running_loop().create_future()
+        fut.set_result(None)
+        handler._message_loop_task = fut
         
         await handler.wait_until_done()
         
-        # Task should be done
-        assert mock_task.done()
+        assert fut.done()
     
     @pytest.mark.asyncio
-    async def test_handle_twilio_message_connected(self, mock_websocket, mock_user):
+    async def test_handle_twilio_message_connected(self, handler):
         """Test handling 'connected' event from Twilio."""
-        handler = TwilioHandler(mock_websocket, mock_user)
-        
         message = {"event": "connected"}
         await handler._handle_twilio_message(message)
         
@@ -156,67 +230,54 @@ class TestTwilioHandler:
         assert True
     
     @pytest.mark.asyncio
-    async def test_handle_twilio_message_start(self, mock_websocket, mock_user, mock_realtime_session):
+    async def test_handle_twilio_message_start(self, handler, _patched_client, mock_realtime_session):
         """Test handling 'start' event from Twilio."""
-        with patch('routers.twilio_handler.Client') as mock_twilio_client:
-            with patch('routers.twilio_handler.start_twilio_call') as mock_start_call:
-                # Mock the Twilio client call fetch
-                mock_call = MagicMock()
-                mock_call._from = "+1234567890"
-                mock_twilio_client.return_value.calls.return_value.fetch.return_value = mock_call
-                
-                handler = TwilioHandler(mock_websocket, mock_user)
-                handler.session = mock_realtime_session
-                
-                message = {
-                    "event": "start",
-                    "start": {
-                        "streamSid": "test-stream-sid",
-                        "callSid": "test-call-sid"
-                    }
+        with patch('routers.twilio_handler.start_twilio_call') as mock_start_call:
+            # Mock the Twilio client call fetch
+            mock_call = MagicMock()
+            mock_call._from = "+1234567890"
+            _patched_client.return_value.calls.return_value.fetch.return_value = mock_call
+            
+            handler.session = mock_realtime_session
+            
+            message = {
+                "event": "start",
+                "start": {
+                    "streamSid": "test-stream-sid",
+                    "callSid": "test-call-sid"
                 }
-                
-                await handler._handle_twilio_message(message)
-                
-                assert handler._stream_sid == "test-stream-sid"
-                assert handler.call_sid == "test-call-sid"
-                
-                # Verify greeting message was sent
-                expected_greeting = (
-                    "The Call SID is test-call-sid. Greet the user with 'Hello! Welcome to the oh die "
-                    "Voice Assistant. How can I help you today?' and then wait for the user to speak. "
-                    "Do not spell out ODAI but pronouce the name as 'oh die'."
-                )
-                mock_realtime_session.send_message.assert_called_once_with(expected_greeting)
-                
-                # Verify start_twilio_call was called
-                mock_start_call.assert_called_once()
+            }
+            
+            await handler._handle_twilio_message(message)
+            
+            assert handler._stream_sid == "test-stream-sid"
+            assert handler.call_sid == "test-call-sid"
+            assert orjson.loads(handler._clear_msg) == {
+                "event": "clear", "streamSid": "test-stream-sid"}
+            
+            # Verify greeting message was sent
+            expected_greeting = (
+                "The Call SID is test-call-sid. Greet the user with 'Hello! Welcome to the oh die "
+                "Voice Assistant. How can I help you today?' and then wait for the user to speak. "
+                "Do not spell out ODAI but pronouce the name as 'oh die'."
+            )
+            mock_realtime_session.send_message.assert_called_once_with(expected_greeting)
+            
+            # Verify start_twilio_call was called
+            mock_start_call.assert_called_once()
     
     @pytest.mark.asyncio
-    async def test_handle_twilio_message_media(self, mock_websocket, mock_user):
+    async def test_handle_twilio_message_media(self, handler):
         """Test handling 'media' event from Twilio."""
-        handler = TwilioHandler(mock_websocket, mock_user)
-        
-        # Create some test audio data
-        test_audio = b"test audio data"
-        encoded_audio = base64.b64encode(test_audio).decode("utf-8")
-        
-        message = {
-            "event": "media",
-            "media": {
-                "payload": encoded_audio
-            }
-        }
+        message = _MEDIA_MSG_TEST_AUDIO
         
         with patch.object(handler, '_handle_media_event') as mock_handle_media:
             await handler._handle_twilio_message(message)
             mock_handle_media.assert_called_once_with(message)
     
     @pytest.mark.asyncio
-    async def test_handle_twilio_message_mark(self, mock_websocket, mock_user):
+    async def test_handle_twilio_message_mark(self, handler):
         """Test handling 'mark' event from Twilio."""
-        handler = TwilioHandler(mock_websocket, mock_user)
-        
         message = {
             "event": "mark",
             "mark": {
@@ -229,81 +290,50 @@ class TestTwilioHandler:
             mock_handle_mark.assert_called_once_with(message)
     
     @pytest.mark.asyncio
-    async def test_handle_twilio_message_stop(self, mock_websocket, mock_user):
+    async def test_handle_twilio_message_stop(self, handler):
         """Test handling 'stop' event from Twilio."""
-        with patch('routers.twilio_handler.Client') as mock_twilio_client:
-            with patch('routers.twilio_handler.end_twilio_call') as mock_end_call:
-                handler = TwilioHandler(mock_websocket, mock_user)
-                handler._stream_sid = "test-stream-sid"
-                handler.call_sid = "test-call-sid"
-                
-                message = {"event": "stop"}
-                await handler._handle_twilio_message(message)
-                
-                # Verify end_twilio_call was called
-                mock_end_call.assert_called_once()
-                # Should not crash and handle gracefully
-                assert True
+        with patch('routers.twilio_handler.end_twilio_call') as mock_end_call:
+            handler._set_stream_sid("test-stream-sid")
+            handler.call_sid = "test-call-sid"
+            
+            message = {"event": "stop"}
+            await handler._handle_twilio_message(message)
+            
+            # Verify end_twilio_call was called
+            mock_end_call.assert_called_once()
     
     @pytest.mark.asyncio
-    async def test_handle_media_event(self, mock_websocket, mock_user, mock_realtime_session):
+    async def test_handle_media_event(self, handler, mock_realtime_session):
         """Test processing audio data from Twilio."""
-        handler = TwilioHandler(mock_websocket, mock_user)
         handler.session = mock_realtime_session
         
-        # Create test audio data
-        test_audio = b"x" * 400  # Exactly BUFFER_SIZE_BYTES
-        encoded_audio = base64.b64encode(test_audio).decode("utf-8")
-        
-        message = {
-            "event": "media",
-            "media": {
-                "payload": encoded_audio
-            }
-        }
-        
         with patch.object(handler, '_flush_audio_buffer') as mock_flush:
-            await handler._handle_media_event(message)
+            await handler._handle_media_event(_MEDIA_MSG_400)
             
             # Should have added to buffer and flushed
             mock_flush.assert_called_once()
     
     @pytest.mark.asyncio
-    async def test_handle_media_event_no_flush(self, mock_websocket, mock_user):
+    async def test_handle_media_event_no_flush(self, handler):
         """Test that small audio data doesn't trigger flush."""
-        handler = TwilioHandler(mock_websocket, mock_user)
-        
-        # Create small test audio data
-        test_audio = b"x" * 100  # Less than BUFFER_SIZE_BYTES
-        encoded_audio = base64.b64encode(test_audio).decode("utf-8")
-        
-        message = {
-            "event": "media",
-            "media": {
-                "payload": encoded_audio
-            }
-        }
-        
         with patch.object(handler, '_flush_audio_buffer') as mock_flush:
-            await handler._handle_media_event(message)
+            await handler._handle_media_event(_MEDIA_MSG_100)
             
             # Should not have flushed
             mock_flush.assert_not_called()
             
             # But should have added to buffer
-            assert len(handler._audio_buffer) == 100
+            assert handler._write_pos - handler._read_pos == 100
     
     @pytest.mark.asyncio
-    async def test_handle_mark_event(self, mock_websocket, mock_user):
+    async def test_handle_mark_event(self, handler):
         """Test handling mark events for playback tracking."""
-        handler = TwilioHandler(mock_websocket, mock_user)
-        
         # Mock the playback tracker
         handler.playback_tracker = MagicMock()
         handler.playback_tracker.on_play_bytes = MagicMock()
         
         # Set up mark data
-        handler._mark_data["1"] = ("item-123", 0, 100)
+        handler._mark_data[1] = ("item-123", 0, 100)
         
         message = {
             "event": "mark",
@@ -320,17 +350,101 @@ class TestTwilioHandler:
         )
         
         # Verify mark data was cleaned up
-        assert "1" not in handler._mark_data
-    
+        assert 1 not in handler._mark_data
+
+    @pytest.mark.asyncio
+    async def test_handle_twilio_message_mark_oversized(self, handler):
+        """Test marks larger than the shared silence buffer still report their length."""
+        handler.playback_tracker = MagicMock()
+        handler._mark_data[1] = ("item-123", 0, 70000)
+
+        await handler._handle_mark_event({"event": "mark", "mark": {"name": "1"}})
+
+        played = handler.playback_tracker.on_play_bytes.call_args[0][2]
+        assert len(played) == 70000
+
+    @pytest.mark.asyncio
+    async def test_flush_times_out_on_stalled_backlog(self, handler):
+        """Test flush gives up when no writer drains the outbound queue."""
+        handler._out_queue.put_nowait("frame")
+
+        with pytest.raises(asyncio.TimeoutError):
+            await handler.flush(timeout=0.01)
+
+    @pytest.mark.asyncio
+    async def test_burst_past_queue_size_waits_for_writer(self, handler, mock_websocket):
+        """Test a burst larger than the outbound queue is sent in full, not dropped."""
+        handler._set_stream_sid("test-stream-sid")
+        mock_websocket.close = AsyncMock()
+        writer = asyncio.create_task(handler._twilio_writer_loop())
+
+        for event in _AUDIO_EVENTS * (MAX_OUTBOUND_FRAMES // len(_AUDIO_EVENTS)):
+            await handler._handle_realtime_event(event)
+        await handler.flush(timeout=1.0)
+
+        mock_websocket.close.assert_not_called()
+        assert mock_websocket.send_text.await_count == 2 * MAX_OUTBOUND_FRAMES
+
+        writer.cancel()
+
     @pytest.mark.asyncio
-    async def test_flush_audio_buffer(self, mock_websocket, mock_user, mock_realtime_session):
+    async def test_slow_client_is_disconnected(self, handler, mock_websocket, monkeypatch):
+        """Test a stalled Twilio socket gets the call dropped once a frame waits too long."""
+        monkeypatch.setattr("routers.twilio_handler.OUTBOUND_STALL_TIMEOUT_S", 0.01)
+        handler._set_stream_sid("test-stream-sid")
+        mock_websocket.close = AsyncMock()
+        unblock = asyncio.Event()
+
+        async def stalled_send(frame):
+            await unblock.wait()
+
+        mock_websocket.send_text = AsyncMock(side_effect=stalled_send)
+        writer = asyncio.create_task(handler._twilio_writer_loop())
+        event = MagicMock(type="audio_interrupted")
+
+        # The writer holds one frame while the queue fills up behind it
+        await handler._handle_realtime_event(event)
+        await asyncio.sleep(0)
+        for _ in range(MAX_OUTBOUND_FRAMES):
+            await handler._handle_realtime_event(event)
+        mock_websocket.close.assert_not_called()
+
+        await handler._handle_realtime_event(event)
+        await handler._handle_realtime_event(event)
+        mock_websocket.close.assert_awaited_once_with(reason="client too slow")
+        assert mock_websocket.send_text.await_count == 1
+
+        writer.cancel()
+
+    @pytest.mark.asyncio
+    async def test_send_error_ends_call(self, handler, mock_websocket):
+        """Test a failed send drops the call and stops the session loop feeding it."""
+        handler._set_stream_sid("test-stream-sid")
+        mock_websocket.close = AsyncMock()
+        mock_websocket.send_text = AsyncMock(side_effect=RuntimeError("socket gone"))
+        handler._realtime_session_task = asyncio.create_task(asyncio.Event().wait())
+        handler._writer_task = asyncio.create_task(handler._twilio_writer_loop())
+        event = MagicMock(type="audio_interrupted")
+
+        await handler._handle_realtime_event(event)
+        await handler._handle_realtime_event(event)
+        await handler._writer_task
+
+        mock_websocket.close.assert_awaited_once_with(reason="send failed")
+        assert handler._realtime_session_task.cancelled()
+        # Later frames are dropped rather than queued for a writer that is gone
+        await handler._handle_realtime_event(event)
+        assert handler._out_queue.empty()
+        assert mock_websocket.send_text.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_flush_audio_buffer(self, handler, mock_realtime_session):
         """Test flushing audio buffer to OpenAI."""
-        handler = TwilioHandler(mock_websocket, mock_user)
         handler.session = mock_realtime_session
         
         # Add some data to buffer
         test_data = b"test audio data"
-        handler._audio_buffer.extend(test_data)
+        handler._buffer_audio(test_data)
         
         await handler._flush_audio_buffer()
         
@@ -338,27 +452,25 @@ class TestTwilioHandler:
         mock_realtime_session.send_audio.assert_called_once_with(test_data)
         
         # Verify buffer was cleared
-        assert len(handler._audio_buffer) == 0
+        assert handler._write_pos - handler._read_pos == 0
     
     @pytest.mark.asyncio
-    async def test_flush_audio_buffer_no_session(self, mock_websocket, mock_user):
+    async def test_flush_audio_buffer_no_session(self, handler):
         """Test flush does nothing without session."""
-        handler = TwilioHandler(mock_websocket, mock_user)
         handler.session = None
         
         # Add some data to buffer
-        handler._audio_buffer.extend(b"test")
+        handler._buffer_audio(b"test")
         
         await handler._flush_audio_buffer()
         
         # Buffer should remain unchanged
-        assert len(handler._audio_buffer) == 4
+        assert handler._write_pos - handler._read_pos == 4
     
     @pytest.mark.asyncio
-    async def test_handle_realtime_event_agent_start(self, mock_websocket, mock_user):
+    async def test_handle_realtime_event_agent_start(self, handler, mock_websocket):
         """Test handling agent_start event."""
-        handler = TwilioHandler(mock_websocket, mock_user)
-        handler._stream_sid = "test-stream-sid"
+        handler._set_stream_sid("test-stream-sid")
         
         event = MagicMock()
         event.type = "agent_start"
@@ -368,6 +480,7 @@ class TestTwilioHandler:
             mock_sound.return_value = "base64_sound_data"
             
             await handler._handle_realtime_event(event)
+            await handler._drain_out_queue()
             
             # Verify sound was generated and sent
             mock_sound.assert_called_once_with(5, 1)
@@ -378,36 +491,49 @@ class TestTwilioHandler:
                     "payload": "base64_sound_data"
                 }
             }
-            mock_websocket.send_json.assert_called_once_with(expected_message)
+            mock_websocket.send_text.assert_called_once()
+            assert json.loads(mock_websocket.send_text.call_args[0][0]) == expected_message
             assert handler.playing_sound is True
+            
+            # A later agent start on the same stream reuses the encoded frame
+            first_frame = mock_websocket.send_text.call_args[0][0]
+            await handler._handle_realtime_event(event)
+            await handler._drain_out_queue()
+            assert mock_websocket.send_text.call_args[0][0] is first_frame
+            mock_sound.assert_called_once()
+            
+            # A new stream gets a frame carrying its own SID
+            handler._set_stream_sid("second-stream-sid")
+            await handler._handle_realtime_event(event)
+            await handler._drain_out_queue()
+            assert json.loads(mock_websocket.send_text.call_args[0][0])["streamSid"] == "second-stream-sid"
     
     @pytest.mark.asyncio
-    async def test_handle_realtime_event_audio(self, mock_websocket, mock_user):
+    async def test_handle_realtime_event_audio(self, handler, mock_websocket):
         """Test handling audio event."""
-        handler = TwilioHandler(mock_websocket, mock_user)
-        handler._stream_sid = "test-stream-sid"
+        handler._set_stream_sid("test-stream-sid")
         handler.playing_sound = True
         
         event = MagicMock()
         event.type = "audio"
-        event.audio.data = b"test audio data"
+        event.audio.data = _TEST_AUDIO
         event.audio.item_id = "item-123"
         event.audio.content_index = 0
         
         await handler._handle_realtime_event(event)
+        await handler._drain_out_queue()
         
         # Verify clear was sent first
         clear_message = {'event': 'clear', 'streamSid': 'test-stream-sid'}
-        assert mock_websocket.send_json.call_args_list[0][0][0] == clear_message
+        assert json.loads(mock_websocket.send_text.call_args_list[0][0][0]) == clear_message
         
         # Verify audio was sent
-        expected_audio = base64.b64encode(b"test audio data").decode("utf-8")
         audio_message = {
             "event": "media",
             "streamSid": "test-stream-sid",
-            "media": {"payload": expected_audio}
+            "media": {"payload": _ENCODED_TEST_AUDIO}
         }
-        assert json.loads(mock_websocket.send_text.call_args_list[0][0][0]) == audio_message
+        assert json.loads(mock_websocket.send_text.call_args_list[1][0][0]) == audio_message
         
         # Verify mark was sent
         assert handler._mark_counter == 1
@@ -416,31 +542,14 @@ class TestTwilioHandler:
             "streamSid": "test-stream-sid",
             "mark": {"name": "1"}
         }
-        assert json.loads(mock_websocket.send_text.call_args_list[1][0][0]) == mark_message
+        assert json.loads(mock_websocket.send_text.call_args_list[2][0][0]) == mark_message
         
         # Verify playing_sound was set to False
         assert handler.playing_sound is False
     
     @pytest.mark.asyncio
-    async def test_handle_realtime_event_audio_interrupted(self, mock_websocket, mock_user):
-        """Test handling audio_interrupted event."""
-        handler = TwilioHandler(mock_websocket, mock_user)
-        handler._stream_sid = "test-stream-sid"
-        
-        event = MagicMock()
-        event.type = "audio_interrupted"
-        
-        await handler._handle_realtime_event(event)
-        
-        # Verify clear was sent
-        expected_message = {"event": "clear", "streamSid": "test-stream-sid"}
-        mock_websocket.send_text.assert_called_once_with(json.dumps(expected_message))
-    
-    @pytest.mark.asyncio
-    async def test_twilio_message_loop(self, mock_websocket, mock_user):
+    async def test_twilio_message_loop(self, handler, mock_websocket):
         """Test the Twilio message loop."""
-        handler = TwilioHandler(mock_websocket, mock_user)
-        
         # Set up messages to receive
         messages = [
             '{"event": "connected"}',
@@ -454,11 +563,36 @@ class TestTwilioHandler:
             
             # Verify each message was handled
             assert mock_handle.call_count == 2
-    
+
     @pytest.mark.asyncio
-    async def test_realtime_session_loop(self, mock_websocket, mock_user, mock_realtime_session):
+    async def test_twilio_message_loop_flushes_backlog(self, handler, mock_websocket):
+        """Test the frames queued when the call ends are sent before the writer stops."""
+        handler._set_stream_sid("test-stream-sid")
+        mock_websocket.receive_text.side_effect = [Exception("Stream closed")]
+        for _ in range(3):
+            await handler._handle_realtime_event(MagicMock(type="audio_interrupted"))
+        handler._writer_task = asyncio.create_task(handler._twilio_writer_loop())
+
+        await handler._twilio_message_loop()
+
+        assert mock_websocket.send_text.await_count == 3
+        assert handler._writer_task.cancelled()
+
+    @pytest.mark.asyncio
+    async def test_twilio_message_loop_invalid_json(self, handler, mock_websocket):
+        """Test the Twilio message loop stops on a malformed message."""
+        mock_websocket.receive_text.side_effect = ['{"event": ']
+
+        with patch.object(handler, '_handle_twilio_message') as mock_handle, \
+             patch('routers.twilio_handler.logger') as mock_log:
+            await handler._twilio_message_loop()
+
+        mock_handle.assert_not_called()
+        assert mock_log.error.call_args[0][0].startswith("Failed to parse Twilio message as JSON")
+
+    @pytest.mark.asyncio
+    async def test_realtime_session_loop(self, handler, mock_realtime_session):
         """Test the realtime session loop."""
-        handler = TwilioHandler(mock_websocket, mock_user)
         handler.session = mock_realtime_session
         
         # Create mock events
@@ -467,24 +601,7 @@ class TestTwilioHandler:
             MagicMock(type="audio_end")
         ]
         
-        # Create an async generator class
-        class AsyncIterator:
-            def __init__(self):
-                self.index = 0
-            
-            def __aiter__(self):
-                return self
-            
-            async def __anext__(self):
-                if self.index < len(events):
-                    event = events[self.index]
-                    self.index += 1
-                    return event
-                raise StopAsyncIteration
-        
-        # Set up the mock session to be an async iterator
-        async_iter = AsyncIterator()
-        mock_realtime_session.__aiter__ = MagicMock(return_value=async_iter)
+        mock_realtime_session.__aiter__ = MagicMock(return_value=_AsyncList(events))
         
         with patch.object(handler, '_handle_realtime_event') as mock_handle:
             await handler._realtime_session_loop()
@@ -493,65 +610,43 @@ class TestTwilioHandler:
             assert mock_handle.call_count == 2
     
     @pytest.mark.asyncio
-    async def test_buffer_flush_loop(self, mock_websocket, mock_user):
+    async def test_buffer_flush_loop(self, handler):
         """Test the buffer flush loop."""
-        handler = TwilioHandler(mock_websocket, mock_user)
-        
         # Add some data to buffer
-        handler._audio_buffer.extend(b"test")
+        handler._buffer_audio(b"test")
         handler._last_buffer_send_time = time.time() - 1  # Make it old
         
-        # Mock asyncio.sleep to stop after first iteration
-        call_count = 0
-        async def mock_sleep(duration):
-            nonlocal call_count
-            call_count += 1
-            if call_count > 1:
-                raise Exception("Stop")
-            return
+        # Let one iteration run, then cancel the loop on the second sleep
+        sleep_mock = AsyncMock(side_effect=[None, asyncio.CancelledError])
         
-        with patch.object(handler, '_flush_audio_buffer') as mock_flush:
-            # Run one iteration of the loop
-            with patch('asyncio.sleep', mock_sleep):
-                # Run the loop - it will exit on exception
-                await handler._buffer_flush_loop()
-                
-                # Should have flushed due to old data
-                mock_flush.assert_called_once()
-    
-    @pytest.mark.asyncio
-    async def test_handle_realtime_event_agent_end(self, mock_websocket, mock_user):
-        """Test handling agent_end event."""
-        handler = TwilioHandler(mock_websocket, mock_user)
+        with patch('asyncio.sleep', sleep_mock), \
+                patch.object(handler, '_flush_audio_buffer', new_callable=AsyncMock) as mock_flush, \
+                pytest.raises(asyncio.CancelledError):
+            await handler._buffer_flush_loop()
         
-        event = MagicMock()
-        event.type = "agent_end"
-        event.agent.name = "TestAgent"
-        
-        with patch.object(logger, 'info') as mock_log:
-            await handler._handle_realtime_event(event)
-            mock_log.assert_called_once_with("Agent ended: TestAgent")
+        # Should have flushed due to old data
+        mock_flush.assert_called_once()
     
+    @pytest.mark.parametrize("event_type,event_attrs,assertion", REALTIME_EVENT_CASES)
     @pytest.mark.asyncio
-    async def test_handle_realtime_event_handoff(self, mock_websocket, mock_user):
-        """Test handling handoff event."""
-        handler = TwilioHandler(mock_websocket, mock_user)
+    async def test_handle_realtime_event(self, handler, mock_websocket, event_type, event_attrs,
+                                         assertion):
+        """Test handling of realtime events that only log or send one message."""
+        handler._set_stream_sid("test-stream-sid")
         
-        event = MagicMock()
-        event.type = "handoff"
-        event.from_agent.name = "Agent1"
-        event.to_agent.name = "Agent2"
+        event = MagicMock(type=event_type, **event_attrs)
         
-        with patch.object(logger, 'info') as mock_log:
+        with patch('routers.twilio_handler.logger') as mock_log:
             await handler._handle_realtime_event(event)
-            mock_log.assert_called_once_with("Handoff from Agent1 to Agent2")
+            await handler._drain_out_queue()
+        
+        assertion(mock_log, mock_websocket)
     
     @pytest.mark.asyncio
-    async def test_handle_realtime_event_tool_start(self, mock_websocket, mock_user):
+    async def test_handle_realtime_event_tool_start(self, handler, mock_user):
         """Test handling tool_start event."""
         with patch('routers.twilio_handler.track_tool_called') as mock_track:
-            handler = TwilioHandler(mock_websocket, mock_user)
-            handler._stream_sid = "test-stream-sid"
+            handler._set_stream_sid("test-stream-sid")
             
             event = MagicMock()
             event.type = "tool_start"
@@ -564,47 +659,8 @@ class TestTwilioHandler:
                 mock_track.assert_called_once_with(mock_user, "test-stream-sid", "TestTool", "Test tool description")
     
     @pytest.mark.asyncio
-    async def test_handle_realtime_event_tool_end(self, mock_websocket, mock_user):
-        """Test handling tool_end event."""
-        handler = TwilioHandler(mock_websocket, mock_user)
-        
-        event = MagicMock()
-        event.type = "tool_end"
-        event.tool.name = "TestTool"
-        event.output = "Test output"
-        
-        with patch.object(logger, 'debug') as mock_log:
-            await handler._handle_realtime_event(event)
-            mock_log.assert_called_once_with("Tool ended: TestTool; output: Test output")
-    
-    @pytest.mark.asyncio
-    async def test_handle_realtime_event_audio_end(self, mock_websocket, mock_user):
-        """Test handling audio_end event."""
-        handler = TwilioHandler(mock_websocket, mock_user)
-        
-        event = MagicMock()
-        event.type = "audio_end"
-        
-        with patch.object(logger, 'debug') as mock_log:
-            await handler._handle_realtime_event(event)
-            mock_log.assert_called_with("Audio end")
-    
-    @pytest.mark.asyncio
-    async def test_handle_realtime_event_unknown(self, mock_websocket, mock_user):
-        """Test handling unknown event type."""
-        handler = TwilioHandler(mock_websocket, mock_user)
-        
-        event = MagicMock()
-        event.type = "unknown_event"
-        
-        # Should not crash
-        await handler._handle_realtime_event(event)
-    
-    @pytest.mark.asyncio
-    async def test_handle_twilio_message_error(self, mock_websocket, mock_user):
+    async def test_handle_twilio_message_error(self, handler):
         """Test error handling in _handle_twilio_message."""
-        handler = TwilioHandler(mock_websocket, mock_user)
-        
         # Create a message that will cause an error by mocking the method to raise
         message = {"event": "media", "media": {}}
         
@@ -616,10 +672,8 @@ class TestTwilioHandler:
                 assert "Error handling Twilio message" in mock_log.call_args[0][0]
     
     @pytest.mark.asyncio
-    async def test_handle_media_event_decode_error(self, mock_websocket, mock_user):
+    async def test_handle_media_event_decode_error(self, handler):
         """Test handling decode error in media event."""
-        handler = TwilioHandler(mock_websocket, mock_user)
-        
         message = {
             "event": "media",
             "media": {
@@ -634,12 +688,10 @@ class TestTwilioHandler:
             assert "Error processing audio from Twilio" in mock_log.call_args[0][0]
     
     @pytest.mark.asyncio
-    async def test_handle_mark_event_error(self, mock_websocket, mock_user):
+    async def test_handle_mark_event_error(self, handler):
         """Test error handling in mark event."""
-        handler = TwilioHandler(mock_websocket, mock_user)
-        
         # Set up mark data
-        handler._mark_data["1"] = ("item-123", 0, 100)
+        handler._mark_data[1] = ("item-123", 0, 100)
         handler.playback_tracker = None  # Will cause AttributeError
         
         message = {
@@ -656,11 +708,10 @@ class TestTwilioHandler:
             assert "Error handling mark event" in mock_log.call_args[0][0]
     
     @pytest.mark.asyncio
-    async def test_flush_audio_buffer_error(self, mock_websocket, mock_user, mock_realtime_session):
+    async def test_flush_audio_buffer_error(self, handler, mock_realtime_session):
         """Test error handling in flush audio buffer."""
-        handler = TwilioHandler(mock_websocket, mock_user)
         handler.session = mock_realtime_session
-        handler._audio_buffer.extend(b"test")
+        handler._buffer_audio(b"test")
         
         # Make send_audio raise an error
         mock_realtime_session.send_audio = AsyncMock(side_effect=Exception("Send failed"))
@@ -672,20 +723,13 @@ class TestTwilioHandler:
             assert "Error sending buffered audio to OpenAI" in mock_log.call_args[0][0]
     
     @pytest.mark.asyncio
-    async def test_realtime_session_loop_error(self, mock_websocket, mock_user, mock_realtime_session):
+    async def test_realtime_session_loop_error(self, handler, mock_realtime_session):
         """Test error handling in realtime session loop."""
-        handler = TwilioHandler(mock_websocket, mock_user)
         handler.session = mock_realtime_session
         
-        # Create an async generator that raises an error
-        class ErrorAsyncIterator:
-            def __aiter__(self):
-                return self
-            
-            async def __anext__(self):
-                raise Exception("Session error")
-        
-        mock_realtime_session.__aiter__ = MagicMock(return_value=ErrorAsyncIterator())
+        # Iterating the session raises immediately
+        mock_realtime_session.__aiter__ = MagicMock(
+            return_value=_AsyncList([], raise_exc=lambda: Exception("Session error")))
         
         with patch.object(logger, 'error') as mock_log:
             await handler._realtime_session_loop()
@@ -707,10 +751,8 @@ class TestTwilioHandler:
                 await handler.start()
     
     @pytest.mark.asyncio
-    async def test_handle_media_event_empty_payload(self, mock_websocket, mock_user):
+    async def test_handle_media_event_empty_payload(self, handler):
         """Test handling media event with empty payload."""
-        handler = TwilioHandler(mock_websocket, mock_user)
-        
         message = {
             "event": "media",
             "media": {
@@ -722,13 +764,11 @@ class TestTwilioHandler:
         await handler._handle_media_event(message)
         
         # Buffer should remain empty
-        assert len(handler._audio_buffer) == 0
+        assert handler._write_pos - handler._read_pos == 0
     
     @pytest.mark.asyncio
-    async def test_handle_mark_event_missing_mark_data(self, mock_websocket, mock_user):
+    async def test_handle_mark_event_missing_mark_data(self, handler):
         """Test handling mark event when mark data is missing."""
-        handler = TwilioHandler(mock_websocket, mock_user)
-        
         message = {
             "event": "mark",
             "mark": {
@@ -740,52 +780,32 @@ class TestTwilioHandler:
         await handler._handle_mark_event(message)
     
     @pytest.mark.asyncio
-    async def test_concurrent_audio_processing(self, mock_websocket, mock_user, mock_realtime_session):
+    async def test_concurrent_audio_processing(self, handler, mock_websocket, mock_realtime_session):
         """Test handling multiple audio events concurrently."""
-        handler = TwilioHandler(mock_websocket, mock_user)
         handler.session = mock_realtime_session
-        handler._stream_sid = "test-stream"
-        
-        # Create multiple audio events
-        tasks = []
-        for i in range(5):
-            event = MagicMock()
-            event.type = "audio"
-            event.audio.data = f"audio{i}".encode()
-            event.audio.item_id = f"item-{i}"
-            event.audio.content_index = i
-            tasks.append(handler._handle_realtime_event(event))
+        handler._set_stream_sid("test-stream")
         
-        # Process all events concurrently
-        await asyncio.gather(*tasks)
+        # Process all audio events concurrently
+        await asyncio.gather(*(handler._handle_realtime_event(event) for event in _AUDIO_EVENTS))
+        await handler._drain_out_queue()
         
         # Verify all audio was sent
         assert mock_websocket.send_text.call_count >= 10  # At least 2 calls per audio event
     
     @pytest.mark.asyncio
-    async def test_buffer_timing_edge_case(self, mock_websocket, mock_user, mock_realtime_session):
+    async def test_buffer_timing_edge_case(self, handler, mock_realtime_session):
         """Test buffer flush timing edge cases."""
-        handler = TwilioHandler(mock_websocket, mock_user)
         handler.session = mock_realtime_session
         
         # Set buffer time to exactly the threshold (0.1 seconds based on code)
         handler._last_buffer_send_time = time.time() - 0.1
-        handler._audio_buffer.extend(b"x" * 10)  # Small amount of data
-        
-        # Mock asyncio.sleep to stop after first iteration
-        call_count = 0
-        async def mock_sleep(duration):
-            nonlocal call_count
-            call_count += 1
-            if call_count > 1:
-                raise Exception("Stop")
-            return
-        
-        with patch('asyncio.sleep', mock_sleep):
-            try:
-                await handler._buffer_flush_loop()
-            except Exception:
-                pass  # Expected
+        handler._buffer_audio(b"x" * 10)  # Small amount of data
+        
+        # Let one iteration run, then cancel the loop on the second sleep
+        sleep_mock = AsyncMock(side_effect=[None, asyncio.CancelledError])
+        
+        with patch('asyncio.sleep', sleep_mock), pytest.raises(asyncio.CancelledError):
+            await handler._buffer_flush_loop()
         
         # Should have flushed due to timeout
         mock_realtime_session.send_audio.assert_called_once()
\ No newline at end of file
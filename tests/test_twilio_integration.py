@@ -2,20 +2,96 @@
 import asyncio
 import base64
 import json
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import orjson
 import pytest
 from fastapi import WebSocket
 
-from routers.twilio_handler import TwilioHandler
+from routers.twilio_handler import _SILENCE, MAX_PENDING_MARKS, TwilioHandler
 from routers.twilio_server import TwilioWebSocketManager, media_stream_endpoint
 
+# Audio payloads, encoded once at import
+_SMALL = b"x" * 50  # Two of these stay under BUFFER_SIZE_BYTES
+_SMALL_B64 = base64.b64encode(_SMALL)
+_LARGE = b"y" * 400  # Crosses BUFFER_SIZE_BYTES on its own
+_LARGE_B64 = base64.b64encode(_LARGE).decode()
+_STALE = b"z" * 50
+_OVERSIZED = b"w" * 1000  # Larger than the preallocated audio buffer
+_RESPONSE_AUDIO = b"response_audio"
+_RESPONSE_B64 = base64.b64encode(_RESPONSE_AUDIO).decode()
+
+
+@dataclass(slots=True)
+class FakeAudio:
+    """Audio payload of a realtime "audio" event."""
+    data: bytes
+    item_id: str
+    content_index: int
+
+
+@dataclass(slots=True)
+class FakeAgent:
+    """Agent reference carried by agent lifecycle events."""
+    name: str
+
+
+@dataclass(slots=True)
+class FakeEvent:
+    """Realtime session event with only the fields the handler reads."""
+    type: str
+    audio: FakeAudio | None = None
+    agent: FakeAgent | None = None
+
+
+@dataclass(slots=True)
+class FakeSession:
+    """Realtime session that replays events and records what it is sent."""
+    events: AsyncIterator[FakeEvent] | None = None
+    entered: int = 0
+    messages: list[str] = field(default_factory=list)
+    sent: list[bytes] = field(default_factory=list)
+
+    async def enter(self) -> None:
+        self.entered += 1
+
+    async def send_message(self, message: str) -> None:
+        self.messages.append(message)
+
+    async def send_audio(self, audio: bytes) -> None:
+        # Copy, as the SDK encodes the audio before send_audio returns
+        self.sent.append(bytes(audio))
+
+    def __aiter__(self) -> AsyncIterator[FakeEvent]:
+        return self.events
+
+
+def _fake_ws() -> Any:
+    """Twilio WebSocket stand-in whose message loop ends on the first receive."""
+    return SimpleNamespace(
+        accept=AsyncMock(),
+        receive_text=AsyncMock(side_effect=Exception("Stop")),
+        send_text=AsyncMock(),
+        send_json=AsyncMock(),
+    )
+
+
+@pytest.fixture(autouse=True)
+def _patched_client():
+    """Patch the Twilio REST Client with a fresh mock for each test."""
+    with patch('routers.twilio_handler.Client') as client_class:
+        yield client_class
+
 
 class TestTwilioIntegration:
     """Integration tests for complete Twilio voice call flows."""
     
-    @pytest.mark.asyncio
-    async def test_complete_call_flow(self):
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_complete_call_flow(self, _patched_client):
         """Test a complete call flow from start to finish."""
         # Create mocks
         mock_websocket = MagicMock(spec=WebSocket)
@@ -38,10 +114,7 @@ class TestTwilioIntegration:
             mock_runner = MagicMock()
             mock_runner_class.return_value = mock_runner
             
-            mock_session = MagicMock()
-            mock_session.enter = AsyncMock()
-            mock_session.send_message = AsyncMock()
-            mock_session.send_audio = AsyncMock()
+            mock_session = FakeSession()
             
             mock_runner.run = AsyncMock(return_value=mock_session)
             
@@ -52,13 +125,12 @@ class TestTwilioIntegration:
             mock_user = MagicMock()
             mock_user.reference_id = "test_user_123"
             
-            # Create handler with Twilio client mocked
-            with patch('routers.twilio_handler.Client') as mock_twilio_client, \
-                 patch('routers.twilio_handler.start_twilio_call') as mock_start_call:
+            # Create handler with the Twilio client call lookup mocked
+            with patch('routers.twilio_handler.start_twilio_call') as mock_start_call:
                 # Mock the Twilio client call fetch
                 mock_call = MagicMock()
                 mock_call._from = "+1234567890"
-                mock_twilio_client.return_value.calls.return_value.fetch.return_value = mock_call
+                _patched_client.return_value.calls.return_value.fetch.return_value = mock_call
                 
                 handler = TwilioHandler(mock_websocket, mock_user)
                 handler.session = mock_session
@@ -82,6 +154,8 @@ class TestTwilioIntegration:
                 json.dumps({"event": "stop"})
             ]
             
+            # The stream stays open after the last message until the test hangs up
+            hang_up = asyncio.Event()
             message_index = 0
             async def mock_receive():
                 nonlocal message_index
@@ -89,50 +163,34 @@ class TestTwilioIntegration:
                     msg = twilio_messages[message_index]
                     message_index += 1
                     return msg
+                await hang_up.wait()
                 raise Exception("No more messages")
             
             mock_websocket.receive_text = mock_receive
             
-            # Simulate OpenAI events
-            events = []
-            
-            # Agent start event
-            agent_start = MagicMock()
-            agent_start.type = "agent_start"
-            agent_start.agent.name = "VoiceAgent"
-            events.append(agent_start)
-            
-            # Audio event
-            audio_event = MagicMock()
-            audio_event.type = "audio"
-            audio_event.audio.data = b"response_audio"
-            audio_event.audio.item_id = "item1"
-            audio_event.audio.content_index = 0
-            events.append(audio_event)
+            # Simulate OpenAI events: agent start, then one audio chunk
+            events = [
+                FakeEvent(type="agent_start", agent=FakeAgent("VoiceAgent")),
+                FakeEvent(type="audio", audio=FakeAudio(_RESPONSE_AUDIO, "item1", 0)),
+            ]
             
             # Setup async iterator for session
-            class EventIterator:
-                def __init__(self):
-                    self.index = 0
-                
-                def __aiter__(self):
-                    return self
-                
-                async def __anext__(self):
-                    if self.index < len(events):
-                        event = events[self.index]
-                        self.index += 1
-                        return event
-                    raise StopAsyncIteration
+            async def _event_iter():
+                for event in events:
+                    yield event
             
-            mock_session.__aiter__ = MagicMock(return_value=EventIterator())
+            mock_session.events = _event_iter()
+            
+            # Collect outbound frames as they are sent
+            _sent: list[str] = []
+            mock_websocket.send_text = AsyncMock(side_effect=_sent.append)
             
             # Start the handler
             await handler.start()
             
             # Verify initial setup
             mock_websocket.accept.assert_called_once()
-            mock_session.enter.assert_called_once()
+            assert mock_session.entered == 1
             
             # Let the tasks run briefly
             await asyncio.sleep(0.1)
@@ -143,49 +201,35 @@ class TestTwilioIntegration:
                 "Voice Assistant. How can I help you today?' and then wait for the user to speak. "
                 "Do not spell out ODAI but pronouce the name as 'oh die'."
             )
-            mock_session.send_message.assert_called_once_with(expected_greeting)
+            assert mock_session.messages == [expected_greeting]
             
             # Verify audio was buffered and sent
-            assert len(handler._audio_buffer) > 0 or mock_session.send_audio.called
+            assert handler._write_pos - handler._read_pos > 0 or mock_session.sent
             
             # Verify keyboard sound was sent for agent start
-            keyboard_msg_sent = False
-            for call in mock_websocket.send_json.call_args_list:
-                if call[0][0].get("media", {}).get("payload") == "keyboard_sound_base64":
-                    keyboard_msg_sent = True
-                    break
-            assert keyboard_msg_sent
-            
-            # Verify response audio was sent
-            response_audio_sent = False
-            for call in mock_websocket.send_text.call_args_list:
-                try:
-                    msg = json.loads(call[0][0])
-                    if msg.get("event") == "media" and "payload" in msg.get("media", {}):
-                        response_audio_sent = True
-                        break
-                except:
-                    pass
-            assert response_audio_sent
+            assert any("keyboard_sound_base64" in call[0][0]
+                       for call in mock_websocket.send_text.call_args_list)
+            
+            # Verify response audio was sent (frames are compact orjson output)
+            assert any('"event":"media"' in m and _RESPONSE_B64 in m for m in _sent)
+
+            # Once the call ends, the session, writer and flush loops are stopped
+            hang_up.set()
+            await handler.wait_until_done()
+            assert handler._realtime_session_task.done()
+            assert handler._writer_task.cancelled()
+            assert handler._buffer_flush_task.cancelled()
     
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_multiple_concurrent_calls(self):
         """Test handling multiple concurrent calls."""
         manager = TwilioWebSocketManager()
         
-        # Create multiple mock websockets
+        # Create multiple fake websockets
         num_calls = 3
-        websockets = []
+        websockets = [_fake_ws() for _ in range(num_calls)]
         handlers = []
         
-        for i in range(num_calls):
-            ws = MagicMock(spec=WebSocket)
-            ws.accept = AsyncMock()
-            ws.receive_text = AsyncMock(side_effect=Exception("Stop"))
-            ws.send_text = AsyncMock()
-            ws.send_json = AsyncMock()
-            websockets.append(ws)
-        
         with patch('routers.twilio_handler.RealtimeRunner') as mock_runner_class, \
              patch('routers.twilio_handler.Settings') as mock_settings_class:
             
@@ -195,41 +239,28 @@ class TestTwilioIntegration:
             
             # Setup mock runner and session for each handler
             mock_runner = MagicMock()
-            mock_session = MagicMock()
-            mock_session.enter = AsyncMock()
-            mock_runner.run = AsyncMock(return_value=mock_session)
+            mock_runner.run = AsyncMock(return_value=FakeSession())
             mock_runner_class.return_value = mock_runner
             
-            # Create handlers concurrently
-            tasks = []
-            
-            # Mock the TwilioHandler
-            with patch('routers.twilio_handler.Client'):
-                # Create mock user
-                mock_user = MagicMock()
-                mock_user.reference_id = "test_user_123"
-                
-                for ws in websockets:
-                    handler = await manager.new_session(ws, mock_user)
-                    handlers.append(handler)
-                    tasks.append(handler.start())
+            # Create mock user
+            mock_user = MagicMock()
+            mock_user.reference_id = "test_user_123"
             
-            # Start all handlers
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            for ws in websockets:
+                handlers.append(await manager.new_session(ws, mock_user))
             
-            # Check for any unexpected errors
-            for result in results:
-                if isinstance(result, Exception) and not isinstance(result, asyncio.CancelledError):
-                    print(f"Error starting handler: {result}")
+            # Run every call concurrently until its stream ends
+            await asyncio.gather(*(handler.start() for handler in handlers))
+            await asyncio.gather(*(handler.wait_until_done() for handler in handlers))
             
-            # Verify all were started
+            # Verify all were started and their writers stopped with the call
             for ws in websockets:
                 ws.accept.assert_called_once()
-            
-            # Verify manager tracks all handlers
             assert len(handlers) == num_calls
+            for handler in handlers:
+                assert handler._writer_task.cancelled()
     
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_error_recovery_flow(self):
         """Test error recovery during call processing."""
         mock_websocket = MagicMock(spec=WebSocket)
@@ -257,8 +288,7 @@ class TestTwilioIntegration:
             mock_user = MagicMock()
             mock_user.reference_id = "test_user_123"
             
-            with patch('routers.twilio_handler.Client'):
-                handler = TwilioHandler(mock_websocket, mock_user)
+            handler = TwilioHandler(mock_websocket, mock_user)
             
             # First attempt should fail
             with pytest.raises(Exception, match="Connection failed"):
@@ -267,56 +297,60 @@ class TestTwilioIntegration:
             # Second attempt should succeed
             await handler.start()
             mock_websocket.accept.assert_called()
+            await handler.wait_until_done()
     
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_audio_buffering_and_flushing(self):
         """Test audio buffering and flushing behavior."""
         mock_websocket = MagicMock(spec=WebSocket)
-        mock_session = MagicMock()
-        mock_session.send_audio = AsyncMock()
+        mock_session = FakeSession()
         
         # Create mock user
         mock_user = MagicMock()
         mock_user.reference_id = "test_user_123"
         
-        with patch('routers.twilio_handler.Client'):
-            handler = TwilioHandler(mock_websocket, mock_user)
+        handler = TwilioHandler(mock_websocket, mock_user)
         handler.session = mock_session
         
-        # Test 1: Small audio chunks don't trigger flush
-        small_chunk = b"x" * 100
-        payload = base64.b64encode(small_chunk).decode()
-        await handler._handle_media_event({
-            "event": "media",
-            "media": {"payload": payload}
-        })
+        # Test 1: Small audio chunks don't trigger flush, whether the payload is str or bytes
+        for media_payload in (_SMALL_B64.decode(), _SMALL_B64):
+            await handler._handle_media_event({
+                "event": "media",
+                "media": {"payload": media_payload}
+            })
         
-        assert len(handler._audio_buffer) == 100
-        mock_session.send_audio.assert_not_called()
+        assert handler._write_pos - handler._read_pos == 100
+        assert not mock_session.sent
         
         # Test 2: Large chunk triggers flush
-        large_chunk = b"y" * 400
-        payload = base64.b64encode(large_chunk).decode()
         await handler._handle_media_event({
             "event": "media",
-            "media": {"payload": payload}
+            "media": {"payload": _LARGE_B64}
         })
         
         # Buffer should be flushed
-        assert len(handler._audio_buffer) == 0
-        mock_session.send_audio.assert_called_once()
+        assert handler._write_pos - handler._read_pos == 0
+        assert len(mock_session.sent) == 1
         
         # Test 3: Time-based flush
-        handler._audio_buffer.extend(b"z" * 50)
+        handler._buffer_audio(_STALE)
         handler._last_buffer_send_time = 0  # Very old timestamp
         
         # Manually trigger flush check
         await handler._flush_audio_buffer()
         
-        assert len(handler._audio_buffer) == 0
-        assert mock_session.send_audio.call_count == 2
+        assert handler._write_pos - handler._read_pos == 0
+        assert len(mock_session.sent) == 2
+
+        # Test 4: A frame larger than the buffer grows it and is sent whole
+        handler._buffer_audio(_STALE)
+        handler._buffer_audio(_OVERSIZED)
+        await handler._flush_audio_buffer()
+
+        assert mock_session.sent[-1] == _STALE + _OVERSIZED
+        assert handler._write_pos == handler._read_pos == 0
     
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_mark_event_playback_tracking(self):
         """Test mark event handling for playback tracking."""
         mock_websocket = MagicMock(spec=WebSocket)
@@ -324,26 +358,21 @@ class TestTwilioIntegration:
         mock_user = MagicMock()
         mock_user.reference_id = "test_user_123"
         
-        with patch('routers.twilio_handler.Client'):
-            handler = TwilioHandler(mock_websocket, mock_user)
+        handler = TwilioHandler(mock_websocket, mock_user)
         
         # Setup playback tracker
         handler.playback_tracker = MagicMock()
         handler.playback_tracker.on_play_bytes = MagicMock()
         
         # Simulate audio event with mark
-        handler._stream_sid = "SM123"
-        event = MagicMock()
-        event.type = "audio"
-        event.audio.data = b"audio_data"
-        event.audio.item_id = "item1"
-        event.audio.content_index = 0
+        handler._set_stream_sid("SM123")
+        event = FakeEvent(type="audio", audio=FakeAudio(b"audio_data", "item1", 0))
         
         await handler._handle_realtime_event(event)
         
         # Verify mark was created
-        assert "1" in handler._mark_data
-        assert handler._mark_data["1"] == ("item1", 0, len(b"audio_data"))
+        assert 1 in handler._mark_data
+        assert handler._mark_data[1] == ("item1", 0, len(b"audio_data"))
         
         # Simulate mark acknowledgment from Twilio
         await handler._handle_mark_event({
@@ -353,13 +382,18 @@ class TestTwilioIntegration:
         
         # Verify playback was tracked
         handler.playback_tracker.on_play_bytes.assert_called_once_with(
-            "item1", 0, b"\x00" * len(b"audio_data")
+            "item1", 0, _SILENCE[:len(b"audio_data")]
         )
         
         # Verify mark data was cleaned up
-        assert "1" not in handler._mark_data
+        assert 1 not in handler._mark_data
+
+        # A burst of unacknowledged marks stays bounded
+        for _ in range(MAX_PENDING_MARKS + 10):
+            await handler._handle_realtime_event(event)
+        assert len(handler._mark_data) <= MAX_PENDING_MARKS
     
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_websocket_manager_lifecycle(self):
         """Test WebSocket manager full lifecycle."""
         with patch('routers.twilio_server.manager') as mock_manager, \
@@ -394,7 +428,7 @@ class TestTwilioIntegration:
                 await media_stream_endpoint(mock_websocket)
                 mock_print.assert_called_with("WebSocket error: Config error")
     
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_voice_interruption_handling(self):
         """Test handling voice interruptions during playback."""
         mock_websocket = MagicMock(spec=WebSocket)
@@ -405,22 +439,29 @@ class TestTwilioIntegration:
         mock_user = MagicMock()
         mock_user.reference_id = "test_user_123"
         
-        with patch('routers.twilio_handler.Client'):
-            handler = TwilioHandler(mock_websocket, mock_user)
-        handler._stream_sid = "SM123"
+        handler = TwilioHandler(mock_websocket, mock_user)
+        handler._set_stream_sid("SM123")
         handler.playing_sound = True
         
         # Simulate audio interrupted event
-        event = MagicMock()
-        event.type = "audio_interrupted"
+        event = FakeEvent(type="audio_interrupted")
         
         await handler._handle_realtime_event(event)
+        await handler._drain_out_queue()
+        clear_frame = mock_websocket.send_text.call_args[0][0]
         
         # Verify clear was sent
-        clear_msg = json.dumps({"event": "clear", "streamSid": "SM123"})
+        clear_msg = orjson.dumps({"event": "clear", "streamSid": "SM123"}).decode()
         mock_websocket.send_text.assert_called_with(clear_msg)
+        assert json.loads(mock_websocket.send_text.call_args[0][0]) == {
+            "event": "clear", "streamSid": "SM123"}
+        
+        # A repeat interruption reuses the frame encoded when the stream started
+        await handler._handle_realtime_event(event)
+        await handler._drain_out_queue()
+        assert mock_websocket.send_text.call_args[0][0] is clear_frame
     
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_graceful_shutdown(self):
         """Test graceful shutdown of active calls."""
         with patch('routers.twilio_server.TwilioHandler') as mock_handler_class:
@@ -445,17 +486,27 @@ class TestTwilioIntegration:
         assert handler == mock_handler
         mock_handler_class.assert_called_once_with(mock_websocket, mock_user)
         
-        # Test simulating active session cancellation
-        real_task = asyncio.create_task(asyncio.sleep(10))
+        # A real handler flushes its outbound backlog before being cancelled
+        ws = MagicMock(spec=WebSocket)
+        ws.send_text = AsyncMock()
+        live_handler = TwilioHandler(ws, mock_user)
+        live_handler._set_stream_sid("SM123")
+        for _ in range(3):
+            await live_handler._handle_realtime_event(FakeEvent(type="audio_interrupted"))
+        writer = asyncio.create_task(live_handler._twilio_writer_loop())
+        
+        await live_handler.flush()
+        assert live_handler._out_queue.empty()
+        assert ws.send_text.await_count == 3
         
-        # Cancel the task to simulate shutdown
-        real_task.cancel()
+        # Cancel the writer to simulate shutdown
+        writer.cancel()
         
         # Give time for cancellation to propagate
         try:
-            await real_task
+            await writer
         except asyncio.CancelledError:
             pass  # Expected
         
         # Verify task was cancelled
-        assert real_task.cancelled()
\ No newline at end of file
+        assert writer.cancelled()
\ No newline at end of file
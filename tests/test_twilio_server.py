@@ -1,5 +1,6 @@
 import asyncio
 import json
+import xml.etree.ElementTree as ET
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -10,13 +11,27 @@ from httpx import Response
 from routers.twilio_server import TWILIO_ROUTER, TwilioWebSocketManager, manager
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def test_client():
-    """Create a test client with the Twilio router."""
+    """Create one test client with the Twilio router for the whole run.
+
+    The routes under test are stateless, so every test can share the app.
+    """
     from fastapi import FastAPI
     app = FastAPI()
     app.include_router(TWILIO_ROUTER)
-    return TestClient(app)
+    with TestClient(app) as client:
+        yield client
+
+
+# (HTTP method, request headers, host expected in the Stream URL) per /incoming request;
+# the URL uses request.url.hostname, so ports are dropped
+INCOMING_CALL_CASES = [
+    pytest.param("POST", {}, "testserver", id="post"),
+    pytest.param("GET", {}, "testserver", id="get"),
+    pytest.param("GET", {"Host": "example.com"}, "example.com", id="custom_host"),
+    pytest.param("GET", {"Host": "example.com:8080"}, "example.com", id="host_with_port"),
+]
 
 
 class TestTwilioWebSocketManager:
@@ -49,46 +64,19 @@ class TestTwilioRoutes:
         assert response.status_code == 200
         assert response.json() == {"message": "Twilio Media Stream Server is running!"}
     
-    def test_incoming_call_post(self, test_client):
-        """Test handling incoming calls via POST."""
-        response = test_client.post("/twilio/incoming")
-        assert response.status_code == 200
-        assert response.headers["content-type"] == "application/xml"
-        
-        # Check that response contains TwiML
-        content = response.text
-        assert "<?xml" in content
-        assert "<Response>" in content
-        assert "<Connect>" in content
-        assert '<Stream url="wss://testserver/twilio/connect" />' in content
-        assert "</Connect>" in content
-        assert "</Response>" in content
-    
-    def test_incoming_call_get(self, test_client):
-        """Test handling incoming calls via GET."""
-        response = test_client.get("/twilio/incoming")
+    @pytest.mark.parametrize("method,headers,expected_host", INCOMING_CALL_CASES)
+    def test_incoming_call_twiml(self, test_client, method, headers, expected_host):
+        """Test /incoming answers with TwiML that streams the call back to this host."""
+        response = test_client.request(method, "/twilio/incoming", headers=headers)
         assert response.status_code == 200
         assert response.headers["content-type"] == "application/xml"
+        assert response.text.startswith('<?xml version="1.0" encoding="UTF-8"?>')
         
-        # Check that response contains TwiML
-        content = response.text
-        assert "<?xml" in content
-        assert "<Response>" in content
-        assert "<Connect>" in content
-        assert '<Stream url="wss://testserver/twilio/connect" />' in content
-        assert "</Connect>" in content
-        assert "</Response>" in content
-    
-    def test_incoming_call_custom_host(self, test_client):
-        """Test that the WebSocket URL uses the correct host."""
-        # Test with custom host header
-        response = test_client.get(
-            "/twilio/incoming",
-            headers={"Host": "example.com"}
-        )
-        assert response.status_code == 200
-        content = response.text
-        assert '<Stream url="wss://example.com/twilio/connect" />' in content
+        root = ET.fromstring(response.text)
+        assert root.tag == "Response"
+        stream = root.find("Connect/Stream")
+        assert stream is not None
+        assert stream.attrib["url"] == f"wss://{expected_host}/twilio/connect"
 
 
 class TestWebSocketEndpoint:
@@ -280,27 +268,6 @@ class TestEdgeCases:
                 handler.start.assert_called_once()
                 handler.wait_until_done.assert_called_once()
     
-    def test_twiml_response_format(self, test_client):
-        """Test that TwiML response is properly formatted."""
-        response = test_client.post("/twilio/incoming")
-        
-        # Verify XML declaration
-        assert response.text.startswith('<?xml version="1.0" encoding="UTF-8"?>')
-        
-        # Verify proper XML structure
-        import xml.etree.ElementTree as ET
-        root = ET.fromstring(response.text)
-        
-        assert root.tag == "Response"
-        connect = root.find("Connect")
-        assert connect is not None
-        
-        stream = connect.find("Stream")
-        assert stream is not None
-        assert "url" in stream.attrib
-        assert stream.attrib["url"].startswith("wss://")
-        assert stream.attrib["url"].endswith("/twilio/connect")
-    
     @pytest.mark.asyncio
     async def test_websocket_unexpected_closure(self):
         """Test handling unexpected WebSocket closure."""
@@ -375,18 +342,6 @@ class TestEdgeCases:
             # Handler should have been started once
             mock_handler.start.assert_called_once()
     
-    def test_incoming_endpoint_url_encoding(self, test_client):
-        """Test that special characters in host are properly handled."""
-        # Test with port number
-        response = test_client.get(
-            "/twilio/incoming",
-            headers={"Host": "example.com:8080"}
-        )
-        assert response.status_code == 200
-        content = response.text
-        # TestClient uses testserver as the hostname
-        assert '/twilio/connect" />' in content
-    
     def test_root_endpoint_json_format(self, test_client):
         """Test that root endpoint returns proper JSON."""
         response = test_client.get("/twilio/")
@@ -0,0 +1,17 @@
+"""Gunicorn worker class that serves the ODAI API on uvloop.
+
+Used by the App Engine entrypoints in app.yaml and prod.yaml:
+``gunicorn -k uvloop_worker.UvloopWorker api:APP``.
+"""
+
+from uvicorn.workers import UvicornWorker
+
+
+class UvloopWorker(UvicornWorker):
+    """UvicornWorker that requires uvloop instead of falling back to asyncio.
+
+    The stock worker uses loop="auto", which silently runs on the default
+    asyncio loop if uvloop fails to import.
+    """
+
+    CONFIG_KWARGS = {**UvicornWorker.CONFIG_KWARGS, "loop": "uvloop"}